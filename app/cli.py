@@ -0,0 +1,110 @@
+"""Caisse en ligne de commande, sans affichage.
+
+Exemples :
+    python -m app.cli serve --port 8765
+    python -m app.cli order "Table 4" "Café" "Marguerite:2" --pay "Carte Bancaire"
+    python -m app.cli x-report
+    python -m app.cli z-report
+    python -m app.cli replay 2025-06-14
+    python -m app.cli --connect 127.0.0.1:8765 order "Table 4" "Café"
+
+Sans `--connect`, les commandes agissent directement sur les données
+locales ; avec, elles pilotent un serveur lancé par `serve`.
+"""
+import argparse
+import json
+import sys
+
+from app.services.order_api import APIError, OrderAPI, OrderAPIClient, OrderAPIServer
+
+
+def _print(result) -> None:
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+def _parse_item(spec: str):
+    """"Nom" ou "Nom:quantité" """
+    name, sep, quantity = spec.rpartition(":")
+    if sep and quantity.isdigit():
+        return name, int(quantity)
+    return spec, 1
+
+
+def _connect(address: str) -> OrderAPIClient:
+    host, _, port = address.rpartition(":")
+    return OrderAPIClient(host or "127.0.0.1", int(port))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connect", metavar="HOTE:PORT",
+                        help="piloter un serveur distant au lieu des données locales")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="exposer l'API JSON sur un socket")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+
+    order = commands.add_parser("order", help="ajouter des articles à une table")
+    order.add_argument("table")
+    order.add_argument("items", nargs="*", help='articles, "Nom" ou "Nom:quantité"')
+    order.add_argument("--pay", metavar="MOYEN", help="encaisser la table ensuite")
+
+    commands.add_parser("tables", help="lister les tables ouvertes")
+    commands.add_parser("x-report", help="totaux du jour sans clôture")
+    commands.add_parser("z-report", help="clôturer la journée")
+
+    replay = commands.add_parser("replay", help="recalculer les totaux d'une journée")
+    replay.add_argument("date", help="YYYY-MM-DD")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if args.connect:
+            parser.error("--connect ne s'utilise pas avec serve")
+        api = OrderAPI()
+        server = OrderAPIServer(api, args.host, args.port)
+        print(f"API caisse en écoute sur {args.host}:{server.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            api.service.close()
+        return 0
+
+    api = _connect(args.connect) if args.connect else OrderAPI()
+    try:
+        if args.command == "order":
+            result = api.call("open_table", table=args.table)
+            for spec in args.items:
+                name, quantity = _parse_item(spec)
+                result = api.call("add_item", table=args.table, name=name, quantity=quantity)
+            if args.pay:
+                result = api.call("pay", table=args.table, payment_method=args.pay)
+        elif args.command == "tables":
+            result = api.call("tables")
+        elif args.command == "x-report":
+            result = api.call("x_report")
+        elif args.command == "z-report":
+            result = api.call("z_report")
+        else:
+            result = api.call("replay_day", date=args.date)
+    except APIError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if isinstance(api, OrderAPIClient):
+            api.close()
+        else:
+            # Termine les écritures en file (journal des tables) avant de quitter
+            api.service.close()
+
+    _print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
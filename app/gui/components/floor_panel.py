@@ -0,0 +1,167 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from app.gui.refresh import RefreshScheduler
+from app.services.order_service import OrderService
+
+
+class FloorPanel(tk.Toplevel):
+    """Vue d'ensemble des tables ouvertes, salle par salle
+
+    L'affichage lit uniquement l'index du registre des tables (total,
+    nombre de lignes, heure d'ouverture) : aucune commande n'est parcourue,
+    même avec des centaines de tables.
+    """
+
+    DURATION_REFRESH_MS = 30000
+
+    def __init__(self, parent, order_service: OrderService,
+                 select_callback: Callable[[str], None],
+                 refresh: Optional[RefreshScheduler] = None):
+        super().__init__(parent)
+        self.order_service = order_service
+        self.registry = order_service.registry
+        self.select_callback = select_callback
+        self.title("Vue de la salle - La Medusa")
+        self.geometry("600x700")
+        self.configure(bg="#f0f0f0")
+
+        # Ligne affichée pour chaque salle et chaque table : id du Treeview et valeurs
+        self._room_rows: Dict[str, Tuple[str, tuple]] = {}
+        self._rows: Dict[str, Tuple[str, tuple]] = {}
+        self._tables_by_iid: Dict[str, str] = {}
+
+        self.create_widgets()
+        self.update_display()
+
+        self._unsubscribe = None
+        if refresh is not None:
+            self._unsubscribe = order_service.subscribe(
+                lambda event, table, data: refresh.mark_dirty(self.update_display))
+        self._timer = self.after(self.DURATION_REFRESH_MS, self._tick)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def create_widgets(self):
+        main_frame = tk.Frame(self, bg="#f0f0f0", padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        title_label = tk.Label(main_frame, text="🗺️ TABLES OUVERTES",
+                               font=("Arial", 16, "bold"), bg="#f0f0f0")
+        title_label.pack(pady=(0, 10))
+
+        self.summary_label = tk.Label(main_frame, text="", font=("Arial", 11),
+                                      bg="#f0f0f0", fg="#2c3e50")
+        self.summary_label.pack(pady=(0, 10))
+
+        list_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        columns = ("lignes", "total", "depuis")
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="tree headings")
+        self.tree.heading("#0", text="Table")
+        self.tree.heading("lignes", text="Articles")
+        self.tree.heading("total", text="Total")
+        self.tree.heading("depuis", text="Ouverte depuis")
+        self.tree.column("#0", width=200)
+        self.tree.column("lignes", width=80, anchor="center")
+        self.tree.column("total", width=100, anchor="e")
+        self.tree.column("depuis", width=120, anchor="e")
+
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Double-1>", self.on_select)
+
+        button_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+
+        tk.Button(button_frame, text="➡️ Ouvrir la table", font=("Arial", 10),
+                  command=self.on_select, bg="#27ae60", fg="white").pack(side=tk.RIGHT, padx=5)
+
+    def update_display(self):
+        """Met à jour l'arbre en n'appliquant que les différences"""
+        if not self.winfo_exists():
+            return
+        now = datetime.now()
+        summary = self.registry.room_summary()
+        statuses = self.registry.overview()
+
+        open_count = sum(count for count, _ in summary.values())
+        self.summary_label.config(
+            text=f"{open_count} table(s) ouverte(s) - {self.registry.open_total:.2f}€ en cours")
+
+        # Salles ayant au moins une table ouverte, dans l'ordre du plan
+        for room, (count, total) in summary.items():
+            values = ("", f"{total:.2f}€", f"{count} ouverte(s)")
+            row = self._room_rows.get(room)
+            if row is None:
+                iid = self.tree.insert("", "end", text=room, values=values, open=True)
+                self._room_rows[room] = (iid, values)
+            elif row[1] != values:
+                self.tree.item(row[0], values=values)
+                self._room_rows[room] = (row[0], values)
+
+        seen = set()
+        for status in statuses:
+            minutes = status.open_minutes(now)
+            values = (status.lines, f"{status.total:.2f}€",
+                      f"{minutes // 60}h{minutes % 60:02d}")
+            parent = self._room_rows[status.room][0]
+            row = self._rows.get(status.table)
+            if row is None:
+                iid = self.tree.insert(parent, "end", text=status.table, values=values)
+                self._tables_by_iid[iid] = status.table
+                self._rows[status.table] = (iid, values)
+            elif row[1] != values:
+                self.tree.item(row[0], values=values)
+                self._rows[status.table] = (row[0], values)
+            seen.add(status.table)
+
+        for table in [table for table in self._rows if table not in seen]:
+            iid = self._rows.pop(table)[0]
+            del self._tables_by_iid[iid]
+            self.tree.delete(iid)
+
+        for room in [room for room in self._room_rows if room not in summary]:
+            self.tree.delete(self._room_rows.pop(room)[0])
+
+        # Ordre du plan pour les salles et les tables
+        rooms = list(self.registry.rooms())
+        room_iids = [self._room_rows[room][0]
+                     for room in sorted(self._room_rows,
+                                        key=lambda r: rooms.index(r) if r in rooms else len(rooms))]
+        if tuple(room_iids) != self.tree.get_children():
+            for index, iid in enumerate(room_iids):
+                self.tree.move(iid, "", index)
+        positions: Dict[str, int] = {}
+        for status in statuses:
+            iid = self._rows[status.table][0]
+            parent = self._room_rows[status.room][0]
+            index = positions.get(parent, 0)
+            if self.tree.index(iid) != index:
+                self.tree.move(iid, parent, index)
+            positions[parent] = index + 1
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        table = self._tables_by_iid.get(selection[0])
+        if table is not None:
+            self.select_callback(table)
+
+    def _tick(self):
+        """Rafraîchit les durées d'ouverture"""
+        self.update_display()
+        self._timer = self.after(self.DURATION_REFRESH_MS, self._tick)
+
+    def _on_destroy(self, event):
+        if event.widget is not self:
+            return
+        self.after_cancel(self._timer)
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
@@ -3,69 +3,127 @@ from tkinter import ttk
 from typing import Dict, Any, Callable
 
 class MenuPanel(tk.Frame):
+    """Onglets du menu, construits à la première ouverture de chaque onglet
+
+    Au démarrage seuls les onglets vides sont créés ; les boutons d'une
+    catégorie sont construits lorsque son onglet est affiché pour la
+    première fois (`<<NotebookTabChanged>>`) puis conservés.
+    """
+
     def __init__(self, parent, menu_data: Dict[str, Any], add_callback: Callable):
         super().__init__(parent, bg="#ffffff", bd=1, relief=tk.RAISED)
         self.menu_data = menu_data
         self.add_callback = add_callback
+        self._tabs: Dict[str, tk.Frame] = {}
+        self._built = set()
         self.create_widgets()
-    
+
     def create_widgets(self):
         # Notebook pour les catégories
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Créer un onglet pour chaque catégorie
-        for category, category_data in self.menu_data.items():
-            frame = tk.Frame(self.notebook, bg="#f8f9fa")
-            self.notebook.add(frame, text=category)
-            
-            # Scrollbar
-            scrollbar = tk.Scrollbar(frame)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            # Canvas pour le défilement
-            canvas = tk.Canvas(frame, yscrollcommand=scrollbar.set, bg="#f8f9fa")
-            canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar.config(command=canvas.yview)
-            
-            # Frame interne pour les boutons
-            inner_frame = tk.Frame(canvas, bg="#f8f9fa")
-            canvas.create_window((0, 0), window=inner_frame, anchor="nw")
-            
-            # Boutons pour chaque item
-            row, col = 0, 0
-            for item_name, price in category_data["items"].items():
-                btn_text = f"{item_name}\n{price:.2f}€"
-                btn = tk.Button(
-                    inner_frame, 
-                    text=btn_text, 
-                    width=15, 
-                    height=3,
-                    font=("Arial", 10),
-                    bg="#3498db",
-                    fg="white",
-                    cursor="hand2",
-                    command=lambda n=item_name, p=price, 
-                           t=category_data["tva_rate"], 
-                           c=category_data["category"]: self.add_callback(n, p, t, c)
-                )
-                btn.grid(row=row, column=col, padx=5, pady=5, sticky="ew")
-                
-                col += 1
-                if col > 2:  # 3 colonnes par ligne
-                    col = 0
-                    row += 1
-            
-            # Configurer le canvas pour le défilement
-            inner_frame.update_idletasks()
-            canvas.config(scrollregion=canvas.bbox("all"))
-            
-            # Bind la molette de la souris
-            canvas.bind("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
-    
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+        # Un onglet vide par catégorie, rempli à sa première ouverture
+        for category in self.menu_data:
+            self._add_tab(category)
+        self._build_selected_tab()
+
+    def _add_tab(self, category: str, index="end") -> None:
+        frame = tk.Frame(self.notebook, bg="#f8f9fa")
+        self.notebook.insert(index, frame, text=category)
+        self._tabs[category] = frame
+
+    def _on_tab_changed(self, event=None):
+        self._build_selected_tab()
+
+    def _build_selected_tab(self) -> None:
+        selected = self.notebook.select()
+        if not selected:
+            return
+        category = self.notebook.tab(selected, "text")
+        if category in self._tabs and category not in self._built:
+            self._build_tab(category)
+
+    def build_all_tabs(self) -> None:
+        """Construit tous les onglets restants (ex. avant une mesure ou un préchargement)"""
+        for category in self.menu_data:
+            if category not in self._built:
+                self._build_tab(category)
+
+    def _build_tab(self, category: str) -> None:
+        frame = self._tabs[category]
+        category_data = self.menu_data[category]
+        self._built.add(category)
+
+        # Scrollbar
+        scrollbar = tk.Scrollbar(frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Canvas pour le défilement
+        canvas = tk.Canvas(frame, yscrollcommand=scrollbar.set, bg="#f8f9fa")
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=canvas.yview)
+
+        # Frame interne pour les boutons
+        inner_frame = tk.Frame(canvas, bg="#f8f9fa")
+        canvas.create_window((0, 0), window=inner_frame, anchor="nw")
+
+        # Boutons pour chaque item
+        row, col = 0, 0
+        for item_name, price in category_data["items"].items():
+            btn_text = f"{item_name}\n{price:.2f}€"
+            btn = tk.Button(
+                inner_frame,
+                text=btn_text,
+                width=15,
+                height=3,
+                font=("Arial", 10),
+                bg="#3498db",
+                fg="white",
+                cursor="hand2",
+                command=lambda n=item_name, p=price,
+                       t=category_data["tva_rate"],
+                       c=category_data["category"]: self.add_callback(n, p, t, c)
+            )
+            btn.grid(row=row, column=col, padx=5, pady=5, sticky="ew")
+
+            col += 1
+            if col > 2:  # 3 colonnes par ligne
+                col = 0
+                row += 1
+
+        # Zone de défilement recalculée quand Tk a placé les boutons,
+        # sans forcer de mise en page pendant le démarrage
+        inner_frame.bind("<Configure>",
+                         lambda e: canvas.config(scrollregion=canvas.bbox("all")))
+
+        # Bind la molette de la souris
+        canvas.bind("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
+
     def update_menu(self, new_menu_data: Dict[str, Any]):
+        """Applique un nouveau menu en ne reconstruisant que les catégories modifiées"""
+        old_menu_data = self.menu_data
         self.menu_data = new_menu_data
-        # Recréer les widgets avec le nouveau menu
-        for widget in self.winfo_children():
-            widget.destroy()
-        self.create_widgets()
+
+        # Catégories supprimées
+        for category in [c for c in self._tabs if c not in new_menu_data]:
+            frame = self._tabs.pop(category)
+            self._built.discard(category)
+            self.notebook.forget(frame)
+            frame.destroy()
+
+        for index, (category, category_data) in enumerate(new_menu_data.items()):
+            frame = self._tabs.get(category)
+            if frame is None:
+                self._add_tab(category, index)
+                continue
+            if self.notebook.index(frame) != index:
+                self.notebook.insert(index, frame)
+            if old_menu_data.get(category) != category_data and category in self._built:
+                # Catégorie modifiée : vidée puis reconstruite à sa prochaine ouverture
+                for widget in frame.winfo_children():
+                    widget.destroy()
+                self._built.discard(category)
+
+        self._build_selected_tab()
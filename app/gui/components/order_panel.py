@@ -1,17 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple
+from app.gui.refresh import RefreshScheduler
 from app.services.order_service import OrderService
 
 class OrderPanel(tk.Frame):
     def __init__(self, parent, order_service: OrderService, 
-                 update_callback: Callable, remove_callback: Callable):
+                 update_callback: Callable, remove_callback: Callable,
+                 refresh: Optional[RefreshScheduler] = None):
         super().__init__(parent, bg="#ffffff", bd=1, relief=tk.RAISED)
         self.order_service = order_service
         self.update_callback = update_callback
         self.remove_callback = remove_callback
+        # Ligne affichée pour chaque article : id du Treeview et valeurs affichées
+        self._rows: Dict[str, Tuple[str, tuple]] = {}
+        self._names_by_iid: Dict[str, str] = {}
+        self._table = None
         self.create_widgets()
         self.update_display()
+        if refresh is not None:
+            # Redessiné une fois par tour de boucle Tk quand la commande change
+            refresh.listen(order_service, self.update_display)
     
     def create_widgets(self):
         # Titre
@@ -63,25 +72,52 @@ class OrderPanel(tk.Frame):
                  command=self.update_display, bg="#3498db", fg="white").pack(side=tk.RIGHT, padx=5)
     
     def update_display(self):
-        # Vider le treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Ajouter les articles
-        for item in self.order_service.current_order.items:
-            self.tree.insert("", "end", values=(
-                item.name,
-                item.quantity,
-                f"{item.price:.2f}€",
-                f"{item.total:.2f}€"
-            ))
+        """Met à jour le Treeview en n'appliquant que les différences
+
+        Les lignes existantes sont modifiées sur place, les nouvelles
+        insérées et les disparues supprimées : la sélection et le
+        défilement sont conservés.
+        """
+        order = self.order_service.current_order
+        if order.table != self._table:
+            # Changement de table : la sélection ne concerne plus la commande affichée
+            self._table = order.table
+            self.tree.selection_remove(self.tree.selection())
+
+        rows = self._rows
+        seen = set()
+        iids = []
+        for item in order.items:
+            values = (item.name, item.quantity, f"{item.price:.2f}€", f"{item.total:.2f}€")
+            row = rows.get(item.name)
+            if row is None:
+                iid = self.tree.insert("", "end", values=values)
+                self._names_by_iid[iid] = item.name
+                rows[item.name] = (iid, values)
+            else:
+                iid = row[0]
+                if row[1] != values:
+                    self.tree.item(iid, values=values)
+                    rows[item.name] = (iid, values)
+            seen.add(item.name)
+            iids.append(iid)
+
+        for name in [name for name in rows if name not in seen]:
+            iid = rows.pop(name)[0]
+            del self._names_by_iid[iid]
+            self.tree.delete(iid)
+
+        # Remettre dans l'ordre de la commande si nécessaire (ex. changement de table)
+        if tuple(iids) != self.tree.get_children():
+            for index, iid in enumerate(iids):
+                self.tree.move(iid, "", index)
     
     def get_selected_item(self):
         selection = self.tree.selection()
         if not selection:
             messagebox.showwarning("Attention", "Veuillez sélectionner un article!")
             return None
-        return self.tree.item(selection[0])["values"][0]  # Nom de l'article
+        return self._names_by_iid.get(selection[0])  # Nom de l'article
     
     def increment_quantity(self):
         item_name = self.get_selected_item()
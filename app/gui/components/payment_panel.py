@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Callable
+from typing import Callable, Optional
+from app.gui.refresh import RefreshScheduler
 from app.services.order_service import OrderService
 
 class PaymentPanel(tk.Frame):
     def __init__(self, parent, order_service: OrderService, 
-                 payment_callback: Callable, print_callback: Callable):
+                 payment_callback: Callable, print_callback: Callable,
+                 refresh: Optional[RefreshScheduler] = None):
         super().__init__(parent, bg="#ffffff", bd=1, relief=tk.RAISED)
         self.order_service = order_service
         self.payment_callback = payment_callback
@@ -15,6 +17,9 @@ class PaymentPanel(tk.Frame):
         
         self.create_widgets()
         self.update_totals()
+        if refresh is not None:
+            # Redessiné une fois par tour de boucle Tk quand la commande change
+            refresh.listen(order_service, self.update_totals)
     
     def create_widgets(self):
         # Titre
@@ -68,10 +73,8 @@ class PaymentPanel(tk.Frame):
     
     def update_totals(self):
         order = self.order_service.current_order
-        tva_summary = order.tva_summary
-        
-        total_ht = sum(summary["ht"] for summary in tva_summary.values())
-        total_tva = sum(summary["tva"] for summary in tva_summary.values())
+        total_ht = order.total_ht
+        total_tva = order.total_tva
         total_ttc = order.total
         
         self.total_ht_label.config(text=f"Total HT: {total_ht:.2f}€")
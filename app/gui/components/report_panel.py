@@ -1,3 +1,4 @@
+import heapq
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Callable
@@ -6,11 +7,13 @@ from app.services.order_service import OrderService
 
 
 class ReportPanel(tk.Toplevel):
+    TOP_SELLERS = 10
+
     def __init__(self, parent, order_service: OrderService):
         super().__init__(parent)
         self.order_service = order_service
         self.title("Rapports - La Medusa")
-        self.geometry("800x600")
+        self.geometry("900x850")
         self.configure(bg="#f0f0f0")
 
         self.create_widgets()
@@ -79,6 +82,35 @@ class ReportPanel(tk.Toplevel):
 
         self.payment_tree.pack(fill=tk.X, padx=5, pady=5)
 
+        # Meilleures ventes et affluence, lues dans les cumuls du jour
+        rollup_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        rollup_frame.pack(fill=tk.BOTH, expand=True)
+
+        top_frame = tk.LabelFrame(rollup_frame, text="Meilleures ventes",
+                                  font=("Arial", 12, "bold"), bg="#f0f0f0")
+        top_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
+
+        columns = ("article", "quantite", "montant")
+        self.top_tree = ttk.Treeview(top_frame, columns=columns, show="headings",
+                                     height=self.TOP_SELLERS)
+        for col, text, width in zip(columns, ["Article", "Qté", "Montant"], [180, 60, 90]):
+            self.top_tree.heading(col, text=text)
+            self.top_tree.column(col, width=width, anchor="w" if col == "article" else "e")
+        self.top_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        hour_frame = tk.LabelFrame(rollup_frame, text="Affluence par heure",
+                                   font=("Arial", 12, "bold"), bg="#f0f0f0")
+        hour_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(5, 0))
+
+        columns = ("heure", "transactions", "montant", "barre")
+        self.hour_tree = ttk.Treeview(hour_frame, columns=columns, show="headings",
+                                      height=self.TOP_SELLERS)
+        for col, text, width in zip(columns, ["Heure", "Tickets", "Montant", ""],
+                                    [60, 60, 90, 120]):
+            self.hour_tree.heading(col, text=text)
+            self.hour_tree.column(col, width=width, anchor="w" if col == "barre" else "e")
+        self.hour_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
         # Boutons d'action
         button_frame = tk.Frame(main_frame, bg="#f0f0f0")
         button_frame.pack(fill=tk.X, pady=(10, 0))
@@ -124,20 +156,56 @@ class ReportPanel(tk.Toplevel):
                 f"{montant:.2f}€"
             ))
 
+        # Meilleures ventes (chiffre d'affaires TTC)
+        for item in self.top_tree.get_children():
+            self.top_tree.delete(item)
+
+        by_item = summary.get("ventes_par_article", {})
+        top = heapq.nlargest(self.TOP_SELLERS, by_item.items(), key=lambda e: e[1]["montant"])
+        for article, details in top:
+            self.top_tree.insert("", "end", values=(
+                article,
+                details["quantite"],
+                f"{details['montant']:.2f}€"
+            ))
+
+        # Affluence par heure d'ouverture des commandes
+        for item in self.hour_tree.get_children():
+            self.hour_tree.delete(item)
+
+        by_hour = summary.get("ventes_par_heure", {})
+        busiest = max((details["transactions"] for details in by_hour.values()), default=0)
+        for heure in sorted(by_hour):
+            details = by_hour[heure]
+            self.hour_tree.insert("", "end", values=(
+                f"{heure}h",
+                details["transactions"],
+                f"{details['montant']:.2f}€",
+                "█" * round(15 * details["transactions"] / busiest)
+            ))
+
     def generate_z_report(self):
         """Génère le rapport Z"""
         if messagebox.askyesno("Confirmation",
                                "Êtes-vous sûr de vouloir générer le rapport Z ?\n\n"
                                "Cette action réinitialisera les compteurs du jour."):
-            try:
-                report = self.order_service.generate_z_report()
-                messagebox.showinfo("Succès",
-                                    f"Rapport Z #{report['numero_rapport']} généré avec succès!\n\n"
-                                    f"Total TTC: {report['total_ventes_ttc']:.2f}€\n"
-                                    f"Nombre de transactions: {report['nombre_transactions']}")
-                self.update_summary()
-            except Exception as e:
-                messagebox.showerror("Erreur", f"Erreur lors de la génération du rapport: {str(e)}")
+            # Écriture en arrière-plan : la caisse reste utilisable pendant le rapport
+            self.order_service.generate_z_report_async(self._on_z_report_done)
+
+    def _on_z_report_done(self, future):
+        """Affiche le résultat du rapport Z (appelé dans le thread Tk)"""
+        if not self.winfo_exists():
+            return
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Erreur", f"Erreur lors de la génération du rapport: {str(error)}")
+            return
+        report = future.result()
+        messagebox.showinfo("Succès",
+                            f"Rapport Z #{report['numero_rapport']} généré avec succès!\n\n"
+                            f"Total TTC: {report['total_ventes_ttc']:.2f}€\n"
+                            f"Nombre de transactions: {report['nombre_transactions']}")
+        self.update_summary()
 
     def export_report(self):
         """Exporte le rapport en CSV"""
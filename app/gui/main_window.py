@@ -1,32 +1,57 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import datetime
-import socket
+from typing import List
 
+from ..models.order import Order
+from ..services.io_worker import IOWorker
 from ..services.order_service import OrderService
+from ..services.print_spooler import PrintBatch, PrintJob, PrintSpooler
+from ..services.printer import PrinterPool
+from ..services.routing import PreparationRouter
+from ..services.ticket_templates import template_for
 from ..utils import config_loader
 from ..utils.config_loader import ConfigLoader
+from .refresh import RefreshScheduler
 from .components.menu_panel import MenuPanel
 from .components.order_panel import OrderPanel
 from .components.payment_panel import PaymentPanel
 from .components.report_panel import ReportPanel
+from .components.floor_panel import FloorPanel
 
 
 
 class MainWindow:
-    def __init__(self, root):
+    def __init__(self, root, order_service=None):
         self.root = root
         self.root.title("Caisse Restaurant - La Medusa")
         self.root.geometry("1400x900")
         self.root.configure(bg="#f0f0f0")
 
-        # Services
-        self.order_service = OrderService()
+        # Services (order_service : RemoteOrderService pour un terminal relié au serveur)
+        self.printer_pool = PrinterPool()
+        # Écritures disque et appels bloquants (ventes, numéros et spool des tickets)
+        self.io_worker = IOWorker()
+        self.io_worker.attach(self.root)
+        if order_service is None:
+            order_service = OrderService(printer_pool=self.printer_pool,
+                                         io_worker=self.io_worker)
+        else:
+            order_service.attach(self.root)
+        self.order_service = order_service
         self.menu_data = ConfigLoader.load_menu()
         self.printer_config = ConfigLoader.load_printer_config()
+        self.preparation_router = PreparationRouter.from_printer_config(self.printer_config)
+        # Les tickets de préparation non imprimés sont conservés dans le spool
+        self.print_spooler = PrintSpooler(self.printer_pool, spool_dir="spool_impression")
+        self.print_spooler.add_listener(self._on_spooled_job)
+        self.print_spooler.attach(self.root)
 
         # Variables
         self.current_table = tk.StringVar(value="Table 1")
+        # Tables dont les tickets sont en cours de numérotation et de mise en spool
+        self._printing = set()
+        self.status_text = tk.StringVar(value="Prêt")
+        self.refresh = RefreshScheduler(self.root)
 
         self.create_widgets()
         self.center_window()
@@ -58,6 +83,16 @@ class MainWindow:
                                command=self.show_reports, bg="#e67e22", fg="white")
         report_btn.pack(side=tk.RIGHT, padx=10, pady=15)
 
+        # Bouton Vue de la salle (tables ouvertes)
+        floor_btn = tk.Button(header_frame, text="🗺️ Salle", font=("Arial", 12),
+                              command=self.show_floor, bg="#16a085", fg="white")
+        floor_btn.pack(side=tk.RIGHT, padx=10, pady=15)
+
+        # Barre d'état (suivi des impressions)
+        status_bar = tk.Label(self.root, textvariable=self.status_text, font=("Arial", 10),
+                              anchor="w", bg="#dfe6e9", fg="#2c3e50", padx=10)
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
         # Content area
         content_frame = tk.Frame(self.root, bg="#f0f0f0")
         content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -71,215 +106,156 @@ class MainWindow:
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
         self.order_panel = OrderPanel(right_frame, self.order_service,
-                                      self.update_quantity, self.remove_from_order)
+                                      self.update_quantity, self.remove_from_order,
+                                      self.refresh)
         self.order_panel.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
 
         self.payment_panel = PaymentPanel(right_frame, self.order_service,
-                                          self.process_payment, self.print_ticket)
+                                          self.process_payment, self.print_ticket,
+                                          self.refresh)
         self.payment_panel.pack(fill=tk.BOTH, expand=True)
 
     def add_to_order(self, item_name: str, price: float, tva_rate: float, category: str):
         self.order_service.add_to_order(item_name, price, tva_rate, category)
-        self.order_panel.update_display()
-        self.payment_panel.update_totals()
 
     def update_quantity(self, item_name: str, delta: int):
         self.order_service.update_quantity(item_name, delta)
-        self.order_panel.update_display()
-        self.payment_panel.update_totals()
 
     def remove_from_order(self, item_name: str):
         self.order_service.remove_from_order(item_name)
-        self.order_panel.update_display()
-        self.payment_panel.update_totals()
 
     def process_payment(self, payment_method: str):
         if not self.order_service.current_order.items:
             messagebox.showwarning("Attention", "Aucun article dans la commande!")
             return
 
-        try:
-            self.order_service.process_payment(payment_method)
-            self.order_panel.update_display()
-            self.payment_panel.update_totals()
-            messagebox.showinfo("Paiement", f"Paiement {payment_method} accepté!")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du paiement: {str(e)}")
+        # La table est libérée tout de suite ; la vente est écrite en arrière-plan
+        self.order_service.process_payment_async(payment_method, self._on_payment_saved)
+        self.status_text.set(f"Paiement {payment_method} en cours d'enregistrement")
+
+    def _on_payment_saved(self, future):
+        """Résultat de l'enregistrement d'une vente (appelé dans le thread Tk)"""
+        error = future.exception()
+        if error is not None:
+            self.status_text.set("Paiement non enregistré - commande remise sur la table")
+            messagebox.showerror("Erreur", f"Erreur lors du paiement: {str(error)}\n\n"
+                                           "La commande a été remise sur la table.")
+            return
+        order = future.result()
+        self.status_text.set(f"Paiement {order.payment_method} enregistré - {order.table}")
+        messagebox.showinfo("Paiement", f"Paiement {order.payment_method} accepté!")
 
     def print_ticket(self):
-        """Imprime le ticket de caisse et les tickets de préparation"""
-        if not self.order_service.current_order.items:
+        """Imprime le ticket de caisse et les tickets de préparation
+
+        Le numéro de ticket et l'écriture des tickets dans le spool se font
+        dans le thread d'écriture, sur une copie de la commande ; les tickets
+        sont ensuite envoyés en parallèle à chaque imprimante : l'interface
+        ne se bloque pas, et le délai total est celui de l'imprimante la plus
+        lente plutôt que la somme de toutes.
+        """
+        order = self.order_service.current_order
+        changes = order.pending_changes()
+        # Une commande vidée peut encore avoir des annulations à envoyer en préparation
+        if not order.items and not changes:
             messagebox.showwarning("Attention", "Aucun article dans la commande!")
             return
-
-        try:
-            order = self.order_service.current_order
-            table = order.table
-
-            # Imprimer le ticket de caisse (client)
-            self._print_receipt_ticket(order)
-
-            # Imprimer les tickets de préparation si nécessaire
-            self._print_kitchen_tickets(order)
-
-            messagebox.showinfo("Impression", "Ticket(s) imprimé(s) avec succès!")
-
-        except Exception as e:
-            messagebox.showerror("Erreur d'impression", f"Erreur lors de l'impression: {str(e)}")
-
-    def _print_receipt_ticket(self, order):
-        """Imprime le ticket de caisse pour le client"""
-        if not self.printer_config["receipt_printer"]["enabled"]:
+        table = order.table
+        if table in self._printing:
+            return
+        self._printing.add(table)
+        snapshot = Order.from_dict(order.to_dict(with_sent=True))
+
+        def task() -> int:
+            ticket_number = self.order_service.next_ticket_number()
+            # Ticket de caisse (client) et tickets de préparation si nécessaire :
+            # seuls les ajouts et annulations depuis le dernier envoi partent en préparation
+            jobs = self._print_kitchen_tickets(snapshot, changes, ticket_number)
+            if snapshot.items:
+                jobs = self._print_receipt_ticket(snapshot, ticket_number) + jobs
+            self.print_spooler.submit_batch(jobs, self._on_print_done)
+            return ticket_number
+
+        def on_spooled(future) -> None:
+            self._printing.discard(table)
+            if future.exception() is not None:
+                messagebox.showerror("Erreur d'impression",
+                                     f"Erreur lors de l'impression: {future.exception()}")
+                return
+            # Les tickets de préparation sont dans le spool : ils seront imprimés
+            self.order_service.mark_sent(changes, table)
+
+        self.status_text.set(f"Impression en cours - {table}")
+        self.io_worker.submit(task, on_spooled)
+
+    def _on_print_done(self, batch: PrintBatch):
+        """Affiche le résultat de chaque imprimante (appelé dans le thread Tk)"""
+        if not batch.jobs:
+            self.status_text.set("Aucune imprimante active")
             return
 
-        try:
-            printer_config = self.printer_config["receipt_printer"]
-            ip = printer_config["ip"]
-            port = printer_config["port"]
-            timeout = printer_config["timeout"]
-
-            # Connexion à l'imprimante
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            sock.connect((ip, port))
-
-            # Préparation du contenu du ticket
-            content = self._generate_receipt_content(order)
-
-            # Envoi des données à l'imprimante
-            sock.sendall(content.encode('utf-8'))
-            sock.close()
-
-        except Exception as e:
-            print(f"Erreur impression ticket caisse: {e}")
-            raise
-
-    def _print_kitchen_tickets(self, order):
-        """Imprime les tickets de préparation pour la cuisine/bar"""
-        # Vérifier s'il y a des articles alimentaires pour la cuisine
-        food_items = [item for item in order.items if item.category == "alimentation"]
-        if food_items and self.printer_config["kitchen_printer"]["enabled"]:
-            self._print_preparation_ticket(order, food_items, "CUISINE", self.printer_config["kitchen_printer"])
-
-        # Vérifier s'il y a des boissons pour le bar
-        drink_items = [item for item in order.items if item.category in ["alcool", "boisson sans alcool"]]
-        if drink_items and self.printer_config["bar_printer"]["enabled"]:
-            self._print_preparation_ticket(order, drink_items, "BAR", self.printer_config["bar_printer"])
-
-    def _print_preparation_ticket(self, order, items, destination, printer_config):
-        """Imprime un ticket de préparation"""
-        try:
-            ip = printer_config["ip"]
-            port = printer_config["port"]
-            timeout = printer_config["timeout"]
-
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            sock.connect((ip, port))
-
-            # Préparation du contenu du ticket de préparation
-            content = self._generate_preparation_content(order, items, destination)
-
-            # Envoi des données à l'imprimante
-            sock.sendall(content.encode('utf-8'))
-            sock.close()
-
-        except Exception as e:
-            print(f"Erreur impression ticket {destination}: {e}")
-
-    def _generate_receipt_content(self, order):
-        """Génère le contenu du ticket de caisse"""
-        content = []
-
-        # En-tête du ticket
-        content.append("\x1B\x40")  # Initialize printer
-        content.append("\x1B\x61\x01")  # Center align
-        content.append("\x1B\x21\x30")  # Double height and width
-        content.append("LA MEDUSA\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append("RESTAURANT\n")
-        content.append("-----------------------------\n")
-        content.append(f"Table: {order.table}\n")
-        content.append(f"Date: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}\n")
-        content.append("-----------------------------\n")
-        content.append("\x1B\x61\x00")  # Left align
-
-        # Articles
-        content.append("\x1B\x21\x10")  # Emphasized
-        content.append("ARTICLE          QTE   PRIX\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append("-----------------------------\n")
-
-        for item in order.items:
-            name = item.name[:16]  # Limiter la longueur du nom
-            qty = str(item.quantity)
-            price = f"{item.total:.2f}€"
-            content.append(f"{name:<16} {qty:>3} {price:>6}\n")
-
-        # Total
-        content.append("-----------------------------\n")
-        content.append("\x1B\x61\x02")  # Right align
-        content.append(f"TOTAL: {order.total:.2f}€\n")
-
-        # Détail TVA
-        content.append("\x1B\x61\x00")  # Left align
-        content.append("-----------------------------\n")
-        tva_summary = order.tva_summary
-        for rate, details in tva_summary.items():
-            content.append(f"TVA {rate}%: {details['tva']:.2f}€\n")
-
-        # Pied de page
-        content.append("-----------------------------\n")
-        content.append("\x1B\x61\x01")  # Center align
-        content.append("Merci pour votre visite !\n")
-        content.append("A bientôt !\n\n\n")
-
-        # Couper le papier
-        content.append("\x1D\x56\x00")  # Cut paper
-
-        return "".join(content)
-
-    def _generate_preparation_content(self, order, items, destination):
-        """Génère le contenu du ticket de préparation"""
-        content = []
-
-        # En-tête du ticket
-        content.append("\x1B\x40")  # Initialize printer
-        content.append("\x1B\x61\x01")  # Center align
-        content.append("\x1B\x21\x30")  # Double height and width
-        content.append(f"{destination}\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append("-----------------------------\n")
-        content.append(f"Table: {order.table}\n")
-        content.append(f"Commande: {len(items)} article(s)\n")
-        content.append("-----------------------------\n")
-        content.append("\x1B\x61\x00")  # Left align
-
-        # Articles
-        content.append("\x1B\x21\x10")  # Emphasized
-        content.append("ARTICLE          QTE\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append("-----------------------------\n")
-
-        for item in items:
-            name = item.name[:16]  # Limiter la longueur du nom
-            qty = str(item.quantity)
-            content.append(f"{name:<16} {qty:>3}\n")
-
-        # Notes spéciales
-        content.append("-----------------------------\n")
-        content.append("NOTES:\n")
-        content.append("-----------------------------\n\n\n")
-
-        # Couper le papier
-        content.append("\x1D\x56\x00")  # Cut paper
-
-        return "".join(content)
+        self.status_text.set(" | ".join(
+            f"{label} : {job.status}" for label, job in batch.results.items()
+        ))
+        for job in batch.failed:
+            if job.printer_name == "receipt_printer":
+                messagebox.showerror("Erreur d'impression",
+                                     f"Erreur lors de l'impression: {job.error}")
+
+    def _on_spooled_job(self, job: PrintJob):
+        """Suit les tickets de préparation réessayés en arrière-plan"""
+        if job.status == PrintJob.RETRYING:
+            self.status_text.set(f"{job.label} injoignable - ticket {job.ticket_number:06d} en file")
+        elif job.status == PrintJob.DONE and job.attempts > 1:
+            self.status_text.set(f"{job.label} : ticket {job.ticket_number:06d} imprimé")
+
+    def _print_receipt_ticket(self, order, ticket_number=None) -> List[PrintJob]:
+        """Prépare le ticket de caisse pour le client"""
+        if not self.printer_config["receipt_printer"]["enabled"]:
+            return []
+
+        # Préparation du contenu du ticket
+        content = self._generate_receipt_content(order, ticket_number)
+
+        return [PrintJob("receipt_printer", self.printer_config["receipt_printer"],
+                         content, "Ticket caisse", ticket_number)]
+
+    def _print_kitchen_tickets(self, order, changes, ticket_number=None) -> List[PrintJob]:
+        """Prépare un ticket de préparation par poste (cuisine, bar...) concerné
+
+        Seules les lignes modifiées depuis le dernier envoi (`changes`) sont imprimées.
+        """
+        return [
+            self._print_preparation_ticket(order, items, station.name,
+                                           station.printer_name, ticket_number)
+            for station, items in self.preparation_router.split(changes).items()
+        ]
+
+    def _print_preparation_ticket(self, order, items, destination, printer_name,
+                                  ticket_number=None) -> PrintJob:
+        """Prépare un ticket de préparation (conservé dans le spool jusqu'à impression)"""
+        content = self._generate_preparation_content(order, items, destination, printer_name,
+                                                     ticket_number)
+        return PrintJob(printer_name, self.printer_config[printer_name],
+                        content, destination, ticket_number, durable=True)
+
+    def _generate_receipt_content(self, order, ticket_number=None) -> bytes:
+        """Génère le contenu ESC/POS du ticket de caisse"""
+        return template_for(self.printer_config["receipt_printer"]).receipt(order, ticket_number)
+
+    def _generate_preparation_content(self, order, items, destination, printer_name,
+                                      ticket_number=None) -> bytes:
+        """Génère le contenu ESC/POS du ticket de préparation"""
+        return template_for(self.printer_config[printer_name]).preparation(
+            order, items, destination, ticket_number)
 
     def on_table_change(self, event=None):
         self.order_service.switch_table(self.current_table.get())
-        self.order_panel.update_display()
-        self.payment_panel.update_totals()
+
+    def select_table(self, table: str):
+        """Affiche la commande d'une table choisie depuis la vue de la salle"""
+        self.current_table.set(table)
+        self.on_table_change()
 
     def center_window(self):
         self.root.update_idletasks()
@@ -291,3 +267,7 @@ class MainWindow:
         """Affiche la fenêtre des rapports"""
         report_window = ReportPanel(self.root, self.order_service)
         report_window.grab_set()
+
+    def show_floor(self):
+        """Affiche la vue d'ensemble des tables ouvertes"""
+        FloorPanel(self.root, self.order_service, self.select_table, self.refresh)
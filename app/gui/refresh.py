@@ -0,0 +1,48 @@
+from typing import Callable, Dict, List
+
+
+class RefreshScheduler:
+    """Regroupe les rafraîchissements de l'interface en un seul par tour de boucle
+
+    Les panneaux marquent leur fonction d'affichage comme « à redessiner »
+    au lieu de se redessiner immédiatement ; toutes les fonctions marquées
+    sont appelées une seule fois au prochain `after_idle`. Une saisie rapide
+    de N articles coûte ainsi un seul rafraîchissement.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        # dict utilisé comme ensemble ordonné : les panneaux sont redessinés
+        # dans l'ordre où ils ont été marqués
+        self._dirty: Dict[Callable[[], None], None] = {}
+        self._scheduled = False
+
+    def mark_dirty(self, *callbacks: Callable[[], None]) -> None:
+        """Demande un rafraîchissement au prochain passage de la boucle Tk"""
+        for callback in callbacks:
+            self._dirty[callback] = None
+        if not self._scheduled:
+            self._scheduled = True
+            self.root.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Redessine immédiatement les panneaux marqués"""
+        self._scheduled = False
+        dirty: List[Callable[[], None]] = list(self._dirty)
+        self._dirty.clear()
+        for callback in dirty:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erreur rafraîchissement: {e}")
+
+    def listen(self, order_service, *callbacks: Callable[[], None]) -> Callable[[], None]:
+        """Redessine `callbacks` à chaque changement de la commande affichée
+
+        Retourne la fonction de désabonnement.
+        """
+        def on_order_event(event: str, table: str, data) -> None:
+            if event == "table_switched" or table == order_service.current_table:
+                self.mark_dirty(*callbacks)
+
+        return order_service.subscribe(on_order_event)
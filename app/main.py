@@ -1,10 +1,24 @@
+import argparse
 import tkinter as tk
 from app.gui.main_window import MainWindow
+from app.services.remote_service import RemoteOrderService
 
 def main():
+    parser = argparse.ArgumentParser(description="Caisse Restaurant - La Medusa")
+    parser.add_argument("--server", metavar="HOTE:PORT",
+                        help="terminal relié à un serveur de commandes (app.services.order_server)")
+    args = parser.parse_args()
+
+    order_service = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        order_service = RemoteOrderService(host or "127.0.0.1", int(port))
+
     root = tk.Tk()
-    app = MainWindow(root)
+    app = MainWindow(root, order_service)
     root.mainloop()
+    app.io_worker.close()
+    app.order_service.close()
 
 if __name__ == "__main__":
     main()
@@ -1,71 +1,306 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
+import sys
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 from datetime import datetime
 
-@dataclass
+
+def to_cents(amount: float) -> int:
+    """Convertit un montant en euros en centimes entiers"""
+    return int(round(amount * 100))
+
+
+def ht_cents(ttc_cents: int, tva_rate: float) -> int:
+    """Montant HT en centimes d'un montant TTC, arrondi au centime le plus proche"""
+    rate = int(round(tva_rate * 100))  # Taux en points de base (10% -> 1000)
+    numerator = ttc_cents * 10000
+    denominator = 10000 + rate
+    if numerator >= 0:
+        return (2 * numerator + denominator) // (2 * denominator)
+    return -((-2 * numerator + denominator) // (2 * denominator))
+
+
 class OrderItem:
-    name: str
-    price: float
-    quantity: int = 1
-    tva_rate: float = 10.0
-    category: str = "alimentation"
-    
+    """Ligne de commande compacte : prix en centimes entiers, sans __dict__"""
+
+    __slots__ = ("name", "price_cents", "quantity", "tva_rate", "category", "sent_quantity")
+
+    def __init__(self, name: str, price: float, quantity: int = 1,
+                 tva_rate: float = 10.0, category: str = "alimentation"):
+        # Les noms et catégories reviennent sans cesse : une seule copie en mémoire
+        self.name = sys.intern(name)
+        self.price_cents = to_cents(price)
+        self.quantity = quantity
+        self.tva_rate = tva_rate
+        self.category = sys.intern(category)
+        # Quantité déjà envoyée en préparation (cuisine, bar...)
+        self.sent_quantity = 0
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+    @property
+    def total_cents(self) -> int:
+        return self.price_cents * self.quantity
+
     @property
     def total(self) -> float:
-        return self.price * self.quantity
-    
+        return self.total_cents / 100
+
     @property
     def tva_amount(self) -> float:
-        return self.total - (self.total / (1 + self.tva_rate / 100))
+        total_cents = self.total_cents
+        return (total_cents - ht_cents(total_cents, self.tva_rate)) / 100
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OrderItem):
+            return NotImplemented
+        return (self.name == other.name and self.price_cents == other.price_cents
+                and self.quantity == other.quantity and self.tva_rate == other.tva_rate
+                and self.category == other.category)
+
+    def __repr__(self) -> str:
+        return (f"OrderItem(name={self.name!r}, price={self.price!r}, "
+                f"quantity={self.quantity!r}, tva_rate={self.tva_rate!r}, "
+                f"category={self.category!r})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "price": self.price,
+            "quantity": self.quantity,
+            "tva_rate": self.tva_rate,
+            "category": self.category
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OrderItem":
+        return cls(data["name"], data["price"], data.get("quantity", 1),
+                   data.get("tva_rate", 10.0), data.get("category", "alimentation"))
+
+class OrderLines:
+    """Lignes d'une commande, dans l'ordre d'affichage et indexées par nom
+
+    La recherche, la modification et la suppression d'une ligne se font en
+    temps constant ; l'itération suit l'ordre d'ajout des lignes.
+    """
+
+    __slots__ = ("_lines",)
+
+    def __init__(self, items: Iterable[OrderItem] = ()):
+        self._lines: Dict[str, OrderItem] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: OrderItem) -> None:
+        self._lines[item.name] = item
+
+    def get(self, name: str) -> Optional[OrderItem]:
+        return self._lines.get(name)
+
+    def pop(self, name: str) -> Optional[OrderItem]:
+        return self._lines.pop(name, None)
+
+    def __getitem__(self, name: str) -> OrderItem:
+        return self._lines[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._lines
+
+    def __iter__(self) -> Iterator[OrderItem]:
+        return iter(self._lines.values())
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, OrderLines):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"OrderLines({list(self)!r})"
 
-@dataclass
 class Order:
-    table: str = "Table 1"
-    items: List[OrderItem] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
-    payment_method: str = ""
-    is_paid: bool = False
-    
+    """Commande d'une table, avec ses totaux TTC par taux tenus en centimes"""
+
+    __slots__ = ("table", "items", "created_at", "payment_method", "is_paid",
+                 "_total_cents", "_ttc_cents_by_rate", "_lines_by_rate", "_removed_sent")
+
+    def __init__(self, table: str = "Table 1", items: Iterable[OrderItem] = (),
+                 created_at: Optional[datetime] = None, payment_method: str = "",
+                 is_paid: bool = False):
+        self.table = table
+        self.items = OrderLines()
+        self.created_at = created_at if created_at is not None else datetime.now()
+        self.payment_method = payment_method
+        self.is_paid = is_paid
+
+        # Totaux courants par taux de TVA, tenus à jour à chaque modification
+        self._total_cents = 0
+        self._ttc_cents_by_rate: Dict[float, int] = {}
+        self._lines_by_rate: Dict[float, int] = {}
+        # Lignes supprimées alors qu'elles avaient été envoyées en préparation
+        self._removed_sent: Dict[str, OrderItem] = {}
+        for item in items:
+            self.add_item(item)
+
+    def _add_line(self, item: OrderItem) -> None:
+        self._lines_by_rate[item.tva_rate] = self._lines_by_rate.get(item.tva_rate, 0) + 1
+        self._apply(item, item.quantity)
+
+    def _remove_line(self, item: OrderItem) -> None:
+        self._apply(item, -item.quantity)
+        self._lines_by_rate[item.tva_rate] -= 1
+        if not self._lines_by_rate[item.tva_rate]:
+            del self._lines_by_rate[item.tva_rate]
+            del self._ttc_cents_by_rate[item.tva_rate]
+
+    def _apply(self, item: OrderItem, quantity_delta: int) -> None:
+        """Répercute une variation de quantité d'une ligne sur les totaux"""
+        ttc = item.price_cents * quantity_delta
+        self._ttc_cents_by_rate[item.tva_rate] = self._ttc_cents_by_rate.get(item.tva_rate, 0) + ttc
+        self._total_cents += ttc
+
     def add_item(self, item: OrderItem) -> None:
-        for existing_item in self.items:
-            if existing_item.name == item.name:
-                existing_item.quantity += item.quantity
-                return
-        self.items.append(item)
-    
+        existing_item = self.items.get(item.name)
+        if existing_item is not None:
+            existing_item.quantity += item.quantity
+            self._apply(existing_item, item.quantity)
+            return
+        removed = self._removed_sent.pop(item.name, None)
+        if removed is not None:
+            item.sent_quantity = removed.sent_quantity
+        self.items.add(item)
+        self._add_line(item)
+
     def remove_item(self, item_name: str) -> None:
-        self.items = [item for item in self.items if item.name != item_name]
-    
+        item = self.items.pop(item_name)
+        if item is not None:
+            self._remove_line(item)
+            if item.sent_quantity:
+                self._removed_sent[item.name] = item
+
     def update_quantity(self, item_name: str, delta: int) -> None:
+        item = self.items.get(item_name)
+        if item is not None:
+            item.quantity += delta
+            self._apply(item, delta)
+            if item.quantity <= 0:
+                self.remove_item(item_name)
+
+    def pending_changes(self) -> List[OrderItem]:
+        """Variations de quantité depuis le dernier envoi en préparation
+
+        Retourne une copie de chaque ligne modifiée dont `quantity` est la
+        différence avec la quantité déjà envoyée : positive pour un ajout,
+        négative pour une annulation (y compris d'une ligne supprimée).
+        """
+        changes = []
         for item in self.items:
-            if item.name == item_name:
-                item.quantity += delta
-                if item.quantity <= 0:
-                    self.remove_item(item_name)
-                break
-    
+            if item.quantity != item.sent_quantity:
+                changes.append(OrderItem(item.name, item.price, item.quantity - item.sent_quantity,
+                                         item.tva_rate, item.category))
+        for item in self._removed_sent.values():
+            changes.append(OrderItem(item.name, item.price, -item.sent_quantity,
+                                     item.tva_rate, item.category))
+        return changes
+
+    def mark_sent(self, changes: Optional[Iterable[OrderItem]] = None) -> None:
+        """Enregistre les quantités envoyées en préparation
+
+        `changes` sont les variations réellement imprimées, telles que
+        retournées par `pending_changes()` : elles sont reportées ligne par
+        ligne, si bien qu'une modification faite entre l'impression et cet
+        appel reste à envoyer. Sans `changes`, toutes les quantités
+        actuelles sont considérées comme envoyées.
+        """
+        if changes is None:
+            for item in self.items:
+                item.sent_quantity = item.quantity
+            self._removed_sent.clear()
+            return
+        for change in changes:
+            item = self.items.get(change.name) or self._removed_sent.get(change.name)
+            if item is None:
+                if not change.quantity:
+                    continue
+                # Ligne imprimée puis supprimée : son annulation reste à envoyer
+                item = OrderItem(change.name, change.price, 0, change.tva_rate, change.category)
+                self._removed_sent[item.name] = item
+            item.sent_quantity += change.quantity
+            if item.name in self._removed_sent and item.sent_quantity <= 0:
+                del self._removed_sent[item.name]
+
+    def merge(self, other: "Order") -> None:
+        """Reprend les lignes d'une autre commande de la table, état d'envoi compris
+
+        Sert à remettre sur la table une commande dont le paiement a échoué,
+        même si de nouveaux articles y ont été saisis entre-temps.
+        """
+        if not self.items or other.created_at < self.created_at:
+            self.created_at = other.created_at
+        for item in other.items:
+            self.add_item(OrderItem(item.name, item.price, item.quantity,
+                                    item.tva_rate, item.category))
+            self.items.get(item.name).sent_quantity += item.sent_quantity
+        for item in other._removed_sent.values():
+            existing = self.items.get(item.name) or self._removed_sent.get(item.name)
+            if existing is None:
+                existing = self._removed_sent[item.name] = OrderItem(
+                    item.name, item.price, 0, item.tva_rate, item.category)
+            existing.sent_quantity += item.sent_quantity
+
+    @property
+    def total_cents(self) -> int:
+        return self._total_cents
+
+    @property
+    def total_ht_cents(self) -> int:
+        return sum(ht_cents(ttc, rate) for rate, ttc in self._ttc_cents_by_rate.items())
+
     @property
     def total(self) -> float:
-        return sum(item.total for item in self.items)
-    
+        return self._total_cents / 100
+
+    @property
+    def total_ht(self) -> float:
+        return self.total_ht_cents / 100
+
+    @property
+    def total_tva(self) -> float:
+        return (self._total_cents - self.total_ht_cents) / 100
+
     @property
     def tva_summary(self) -> Dict[float, Dict[str, float]]:
+        # Le HT est calculé par taux sur le TTC exact : HT + TVA = TTC au centime près
         summary = {}
-        for item in self.items:
-            if item.tva_rate not in summary:
-                summary[item.tva_rate] = {"ht": 0, "tva": 0, "ttc": 0}
-            
-            ht = item.total / (1 + item.tva_rate / 100)
-            tva = item.total - ht
-            
-            summary[item.tva_rate]["ht"] += ht
-            summary[item.tva_rate]["tva"] += tva
-            summary[item.tva_rate]["ttc"] += item.total
-        
+        for rate, ttc in self._ttc_cents_by_rate.items():
+            ht = ht_cents(ttc, rate)
+            summary[rate] = {"ht": ht / 100, "tva": (ttc - ht) / 100, "ttc": ttc / 100}
         return summary
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Order):
+            return NotImplemented
+        return (self.table == other.table and self.items == other.items
+                and self.created_at == other.created_at
+                and self.payment_method == other.payment_method
+                and self.is_paid == other.is_paid)
+
+    def __repr__(self) -> str:
+        return (f"Order(table={self.table!r}, items={self.items!r}, "
+                f"created_at={self.created_at!r}, payment_method={self.payment_method!r}, "
+                f"is_paid={self.is_paid!r})")
+
+    def to_dict(self, with_sent: bool = False) -> Dict[str, Any]:
+        """Format des ventes enregistrées
+
+        Avec `with_sent`, l'état d'envoi en préparation est inclus
+        (synchronisation entre terminaux, tables ouvertes sauvegardées).
+        """
+        data = {
             "table": self.table,
             "items": [
                 {
@@ -82,7 +317,21 @@ class Order:
             "is_paid": self.is_paid,
             "created_at": self.created_at.isoformat()
         }
-    
+        if with_sent:
+            for item_data, item in zip(data["items"], self.items):
+                item_data["sent_quantity"] = item.sent_quantity
+            data["removed_sent"] = [
+                {
+                    "name": item.name,
+                    "price": item.price,
+                    "sent_quantity": item.sent_quantity,
+                    "tva_rate": item.tva_rate,
+                    "category": item.category
+                }
+                for item in self._removed_sent.values()
+            ]
+        return data
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Order':
         order = cls(
@@ -90,17 +339,26 @@ class Order:
             payment_method=data.get("payment_method", ""),
             is_paid=data.get("is_paid", False)
         )
-        
+
         if "created_at" in data:
             order.created_at = datetime.fromisoformat(data["created_at"])
-        
+
         for item_data in data.get("items", []):
-            order.add_item(OrderItem(
+            item = OrderItem(
                 name=item_data["name"],
                 price=item_data["price"],
                 quantity=item_data["quantity"],
                 tva_rate=item_data.get("tva_rate", 10.0),
                 category=item_data.get("category", "alimentation")
-            ))
-        
+            )
+            order.add_item(item)
+            item.sent_quantity = item_data.get("sent_quantity", 0)
+
+        for item_data in data.get("removed_sent", []):
+            item = OrderItem(item_data["name"], item_data["price"], 0,
+                             item_data.get("tva_rate", 10.0),
+                             item_data.get("category", "alimentation"))
+            item.sent_quantity = item_data["sent_quantity"]
+            order._removed_sent[item.name] = item
+
         return order
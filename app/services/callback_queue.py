@@ -0,0 +1,48 @@
+import queue
+from typing import Any, Callable
+
+
+class CallbackQueue:
+    """Callbacks produits par des threads de fond, exécutés dans le thread Tk
+
+    Les threads de fond (écritures, impression, connexion au serveur)
+    mettent `(callback, résultat)` en file avec `put()` ; `poll()` les
+    exécute dans le thread appelant, et `attach()` l'appelle
+    périodiquement depuis la boucle Tk via `after()`.
+    """
+
+    def __init__(self, error_label: str = "Erreur callback"):
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._error_label = error_label
+        self._root = None
+        self._poll_interval = 50
+
+    def put(self, callback: Callable[[Any], None], result: Any) -> None:
+        self._queue.put((callback, result))
+
+    def poll(self) -> None:
+        """Exécute les callbacks en attente (à appeler depuis le thread Tk)"""
+        while True:
+            try:
+                callback, result = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"{self._error_label}: {e}")
+
+    def attach(self, root, interval_ms: int = 50) -> None:
+        """Livre les callbacks dans la boucle Tk toutes les `interval_ms`"""
+        self._root = root
+        self._poll_interval = interval_ms
+        self._schedule()
+
+    def _schedule(self) -> None:
+        self.poll()
+        if self._root is not None:
+            self._root.after(self._poll_interval, self._schedule)
+
+    def detach(self) -> None:
+        """Arrête les appels périodiques de `poll()`"""
+        self._root = None
@@ -0,0 +1,120 @@
+"""Imprimante ESC/POS factice pour tester l'impression sans matériel.
+
+Usage : python -m app.services.fake_printer --port 9100 [--delay 0.5] [--output tickets.bin]
+"""
+import argparse
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Optional
+
+
+class _TicketHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: FakePrinterServer = self.server
+        with server.lock:
+            server.connections += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.clients.add(self.request)
+        try:
+            while True:
+                data = self.request.recv(4096)
+                if not data:
+                    return
+                if server.delay:
+                    time.sleep(server.delay)
+                server.record(data)
+        except OSError:
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+                server.clients.discard(self.request)
+
+
+class FakePrinterServer(socketserver.ThreadingTCPServer):
+    """Serveur TCP qui enregistre les octets reçus comme une imprimante 9100
+
+    `connections` compte les connexions acceptées (utile pour vérifier la
+    réutilisation du pool), `max_active` le nombre maximal de connexions
+    simultanées, `delay` simule une imprimante lente.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 64
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0,
+                 output: Optional[str] = None):
+        super().__init__((host, port), _TicketHandler)
+        self.delay = delay
+        self.output = output
+        self.lock = threading.Lock()
+        self.received = bytearray()
+        self.chunks: List[bytes] = []
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.clients = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def printer_config(self) -> dict:
+        """Entrée de printer_config.json pointant vers ce serveur"""
+        host, port = self.server_address[:2]
+        return {"enabled": True, "ip": host, "port": port, "timeout": 5,
+                "name": "Imprimante factice"}
+
+    def record(self, data: bytes) -> None:
+        with self.lock:
+            self.received.extend(data)
+            self.chunks.append(data)
+        if self.output:
+            with open(self.output, 'ab') as f:
+                f.write(data)
+
+    def start(self) -> "FakePrinterServer":
+        """Démarre le serveur dans un thread de fond"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Arrête le serveur et coupe les connexions ouvertes (imprimante éteinte)"""
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    server = FakePrinterServer(args.host, args.port, args.delay, args.output)
+    print(f"Imprimante factice en écoute sur {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
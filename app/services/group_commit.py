@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+from app.services.storage import SalesStore
+
+# Écriture, annulation de son état en mémoire, Future d'acquittement
+_Entry = Tuple[Callable[[], None], Optional[Callable[[], None]], Future]
+
+
+class GroupCommitter:
+    """Regroupe les écritures durables des paiements rapprochés
+
+    Les écritures soumises pendant la fenêtre `max_delay` (ou jusqu'à
+    `max_batch` écritures) sont exécutées dans un seul `store.batch()` :
+    un fsync par journal ou une transaction SQLite pour tout le lot. Le
+    Future de chaque écriture n'est résolu qu'une fois le lot durable.
+
+    Chaque écriture a son propre point de sauvegarde : une écriture en
+    échec est annulée en entier sans toucher aux autres. Son `rollback`
+    (état en mémoire, comme les totaux du jour) est appelé quand ses
+    effets sont abandonnés, qu'elle échoue ou que tout le lot échoue.
+    """
+
+    def __init__(self, store: SalesStore, max_delay: float = 0.005, max_batch: int = 64):
+        self.store = store
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[_Entry]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Callable[[], None],
+               rollback: Optional[Callable[[], None]] = None) -> Future:
+        """Soumet une écriture ; le Future est résolu quand le lot est durable"""
+        if self._closed:
+            raise RuntimeError("Le commit groupé est arrêté")
+        future: Future = Future()
+        self._queue.put((write, rollback, future))
+        return future
+
+    def write(self, write: Callable[[], None],
+              rollback: Optional[Callable[[], None]] = None) -> None:
+        """Soumet une écriture et attend son acquittement"""
+        self.submit(write, rollback).result()
+
+    def _collect(self) -> List[_Entry]:
+        """Attend la première écriture puis celles qui arrivent dans la fenêtre
+
+        Le lot est fermé dès que la file reste vide pendant `max_delay / 10`,
+        sans jamais dépasser `max_delay` après la première écriture : les
+        terminaux qui attendent leur acquittement ne paient pas toute la fenêtre.
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        idle = self.max_delay / 10
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, idle)))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _rollback(rollback: Optional[Callable[[], None]]) -> None:
+        if rollback is None:
+            return
+        try:
+            rollback()
+        except Exception as e:
+            print(f"Erreur lors de l'annulation d'une écriture: {e}")
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # Repéré avant d'ouvrir le lot : close() se termine même si le lot échoue
+            stop = any(write is None for write, _, _ in batch)
+            entries = [entry for entry in batch if entry[0] is not None]
+            results = []
+            kept = []
+            try:
+                with self.store.batch():
+                    for write, rollback, future in entries:
+                        try:
+                            with self.store.savepoint():
+                                write()
+                            results.append((future, None))
+                            kept.append(rollback)
+                        except Exception as e:
+                            self._rollback(rollback)
+                            results.append((future, e))
+            except Exception as e:
+                # Le lot n'a pas pu être rendu durable : aucun paiement n'est acquitté
+                for rollback in reversed(kept):
+                    self._rollback(rollback)
+                results = [(future, e) for _, _, future in entries]
+
+            for future, error in results:
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Vide la file puis arrête le thread d'écriture"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((None, None, None))
+        self._thread.join()
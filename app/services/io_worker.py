@@ -0,0 +1,61 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from app.services.callback_queue import CallbackQueue
+
+
+class IOWorker:
+    """Thread de fond pour les écritures disque (ventes, rapports Z)
+
+    Les tâches sont exécutées une à une dans l'ordre de soumission : les
+    écritures d'une même commande, puis un rapport Z demandé après elles,
+    ne peuvent pas se doubler. Chaque tâche retourne un `Future` ; les
+    callbacks reçoivent ce Future et sont exécutés par `poll()`, que
+    `attach()` appelle depuis la boucle Tk, comme pour le spooler
+    d'impression.
+    """
+
+    def __init__(self):
+        self._tasks: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._done = CallbackQueue("Erreur callback écriture")
+        self._thread = threading.Thread(target=self._run, name="io-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, task: Callable[[], Any],
+               callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """Met une tâche en file et retourne immédiatement"""
+        future: Future = Future()
+        self._tasks.put((task, future, callback))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            entry = self._tasks.get()
+            if entry is None:
+                return
+            task, future, callback = entry
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(task())
+            except BaseException as e:
+                print(f"Erreur écriture en arrière-plan: {e}")
+                future.set_exception(e)
+            if callback is not None:
+                self._done.put(callback, future)
+
+    def poll(self) -> None:
+        """Exécute les callbacks des tâches terminées (à appeler depuis le thread Tk)"""
+        self._done.poll()
+
+    def attach(self, root, interval_ms: int = 50) -> None:
+        """Livre les callbacks dans la boucle Tk toutes les `interval_ms`"""
+        self._done.attach(root, interval_ms)
+
+    def close(self) -> None:
+        """Termine les tâches en file puis arrête le thread"""
+        self._done.detach()
+        self._tasks.put(None)
+        self._thread.join()
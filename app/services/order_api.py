@@ -0,0 +1,200 @@
+"""API sans interface graphique au-dessus d'OrderService.
+
+Les requêtes et réponses sont des dictionnaires JSON :
+    {"action": "add_item", "table": "Table 4", "name": "Café"}
+    -> {"ok": true, "result": {...}} ou {"ok": false, "error": "..."}
+
+`OrderAPI` les traite en local ; `OrderAPIServer` les expose sur un socket
+TCP (un objet JSON par ligne) et `OrderAPIClient` s'y connecte.
+"""
+import json
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.models.order import OrderItem
+from app.services.order_service import OrderService, TableHandle
+from app.utils.config_loader import ConfigLoader
+
+
+class APIError(Exception):
+    """Requête invalide (action inconnue, article absent du menu...)"""
+
+
+class OrderAPI:
+    """Traduit les requêtes JSON en opérations d'OrderService"""
+
+    def __init__(self, service: Optional[OrderService] = None):
+        self.service = service if service is not None else OrderService()
+        self._actions: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "tables": self._tables,
+            "open_table": self._open_table,
+            "get_order": self._open_table,
+            "add_item": self._add_item,
+            "update_quantity": self._update_quantity,
+            "remove_item": self._remove_item,
+            "pay": self._pay,
+            "mark_sent": self._mark_sent,
+            "ticket_number": self._ticket_number,
+            "x_report": self._x_report,
+            "z_report": self._z_report,
+            "replay_day": self._replay_day,
+        }
+
+    def call(self, action: str, **params) -> Any:
+        """Exécute une action et retourne son résultat (lève APIError en cas d'erreur)"""
+        response = self.handle({"action": action, **params})
+        if not response["ok"]:
+            raise APIError(response["error"])
+        return response["result"]
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Traite une requête et retourne la réponse à renvoyer au client"""
+        try:
+            handler = self._actions.get(request.get("action"))
+            if handler is None:
+                raise APIError(f"Action inconnue: {request.get('action')}")
+            return {"ok": True, "result": handler(request)}
+        except KeyError as e:
+            return {"ok": False, "error": f"Paramètre manquant: {e.args[0]}"}
+        except (APIError, ValueError, TypeError) as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            print(f"Erreur API {request.get('action')}: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def _select(self, request: Dict[str, Any]) -> TableHandle:
+        table = request.get("table")
+        if not table:
+            raise APIError("Paramètre 'table' manquant")
+        return self.service.table(table)
+
+    def _tables(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        registry = self.service.registry
+        return {
+            "tables": registry.tables(),
+            "salles": registry.rooms(),
+            "ouvertes": registry.open_tables(),
+            "statut": [status.to_dict() for status in registry.overview()]
+        }
+
+    def _open_table(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self._select(request).to_dict()
+
+    def _add_item(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        name = request["name"]
+        details = ConfigLoader.find_item(name) or {}
+        price = request.get("price", details.get("price"))
+        if price is None:
+            raise APIError(f"Article inconnu: {name}")
+        handle = self._select(request)
+        with handle:
+            handle.add_item(name, float(price),
+                            request.get("tva_rate", details.get("tva_rate", 10.0)),
+                            request.get("category", details.get("category", "alimentation")),
+                            int(request.get("quantity", 1)))
+            return handle.to_dict()
+
+    def _update_quantity(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handle = self._select(request)
+        with handle:
+            handle.update_quantity(request["name"], int(request.get("delta", 1)))
+            return handle.to_dict()
+
+    def _remove_item(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handle = self._select(request)
+        with handle:
+            handle.remove_item(request["name"])
+            return handle.to_dict()
+
+    def _pay(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        order = self._select(request).pay(request.get("payment_method", "Espèces"))
+        return order.to_dict()
+
+    def _mark_sent(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handle = self._select(request)
+        changes = request.get("changes")
+        with handle:
+            handle.mark_sent(None if changes is None
+                             else [OrderItem.from_dict(change) for change in changes])
+            return handle.to_dict()
+
+    def _ticket_number(self, request: Dict[str, Any]) -> int:
+        return self.service.next_ticket_number()
+
+    def _x_report(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self.service.get_current_day_summary()
+
+    def _z_report(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self.service.generate_z_report()
+
+    def _replay_day(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return self.service.replay_day(request["date"])
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        api: OrderAPI = self.server.api
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": f"JSON invalide: {e}"}
+            else:
+                response = api.handle(request)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+
+
+class OrderAPIServer(socketserver.ThreadingTCPServer):
+    """Serveur JSON (une requête par ligne) pour piloter la caisse à distance"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, api: OrderAPI, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _RequestHandler)
+        self.api = api
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "OrderAPIServer":
+        """Démarre le serveur dans un thread de fond"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class OrderAPIClient:
+    """Client de l'API JSON, avec la même méthode `call` qu'OrderAPI"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, timeout: float = 10.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rwb')
+        self._lock = threading.Lock()
+
+    def call(self, action: str, **params) -> Any:
+        request = json.dumps({"action": action, **params}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(request.encode('utf-8') + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connexion fermée par le serveur")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise APIError(response["error"])
+        return response["result"]
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
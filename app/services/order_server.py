@@ -0,0 +1,151 @@
+"""Serveur de commandes partagé entre plusieurs terminaux.
+
+Le serveur possède les tables et le stockage des ventes ; les terminaux
+(caisse du bar, caisse de salle, tablettes) s'y connectent en TCP et
+échangent un objet JSON par ligne :
+
+    requête  : {"id": 7, "action": "add_item", "table": "Table 4", "name": "Café"}
+    réponse  : {"id": 7, "ok": true, "result": {...}}
+    événement: {"event": "item_added", "table": "Table 4", "data": "Café", "order": {...}}
+
+Les actions sont celles d'`OrderAPI`. Chaque modification d'une table est
+poussée à tous les terminaux connectés avec l'état complet de la table.
+
+Usage : python -m app.services.order_server [--host 0.0.0.0] [--port 8766]
+"""
+import argparse
+import asyncio
+import json
+import threading
+from typing import Any, Optional, Set
+
+from app.services.order_api import OrderAPI
+from app.services.order_service import OrderService
+
+
+def _encode(message: Any) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+class OrderServer:
+    """Serveur asyncio : requêtes des terminaux et diffusion des changements
+
+    Les opérations d'OrderService (écritures disque comprises) sont
+    exécutées dans le pool de threads de la boucle ; la boucle elle-même
+    ne fait que lire, écrire et diffuser, et reste disponible pour des
+    dizaines de terminaux. Les verrous par table d'OrderService
+    sérialisent les terminaux qui travaillent sur la même table.
+    """
+
+    def __init__(self, service: Optional[OrderService] = None,
+                 host: str = "127.0.0.1", port: int = 8766):
+        self.api = OrderAPI(service)
+        self.service = self.api.service
+        self.host = host
+        self.port = port
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._unsubscribe = None
+
+    def _on_order_event(self, event: str, table: str, data: Any) -> None:
+        """Appelé dans le thread qui a modifié la table : diffusion via la boucle"""
+        if event == "table_switched" or self._loop is None:
+            return
+        message = _encode({"event": event, "table": table, "data": data,
+                           "order": self.service.table(table).to_dict()})
+        self._loop.call_soon_threadsafe(self._broadcast, message)
+
+    def _broadcast(self, message: bytes) -> None:
+        for writer in list(self._clients):
+            if writer.is_closing():
+                self._clients.discard(writer)
+                continue
+            writer.write(message)
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    writer.write(_encode({"ok": False, "error": f"JSON invalide: {e}"}))
+                    continue
+                response = await loop.run_in_executor(None, self.api.handle, request)
+                if "id" in request:
+                    response["id"] = request["id"]
+                writer.write(_encode(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._unsubscribe = self.service.subscribe(self._on_order_event)
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def serve_forever(self) -> None:
+        """Lance le serveur dans le thread courant (bloquant)"""
+        try:
+            asyncio.run(self._serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self._unsubscribe is not None:
+                self._unsubscribe()
+                self._unsubscribe = None
+
+    def start(self) -> "OrderServer":
+        """Lance le serveur dans un thread de fond et attend qu'il écoute"""
+        self._thread = threading.Thread(target=self.serve_forever, name="order-server",
+                                        daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None or self._server is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        for writer in list(self._clients):
+            self._loop.call_soon_threadsafe(writer.close)
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = OrderServer(host=args.host, port=args.port)
+    print(f"Serveur de commandes en écoute sur {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,219 +1,680 @@
-import json
-import os
+import copy
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, List, Optional
-from app.models.order import Order, OrderItem
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from app.models.order import Order, OrderItem, to_cents
+from app.services.group_commit import GroupCommitter
+from app.services.io_worker import IOWorker
+from app.services.printer import PrinterPool
+from app.services.storage import SalesStore, create_store
+from app.services.table_journal import TableJournal, payment_key
+from app.services.table_registry import TableRegistry
+from app.services.ticket_templates import template_for
+from app.utils.config_loader import ConfigLoader
+
+def _add_cents(total: float, amount: float) -> float:
+    """Additionne deux montants en euros sans dérive d'arrondi"""
+    return (to_cents(total) + to_cents(amount)) / 100
+
+
+class _UndoLog:
+    """Valeurs remplacées dans les totaux du jour, pour retirer une vente
+
+    Une vente touche un nombre borné de valeurs : les noter coûte bien
+    moins que copier tous les totaux (cumuls par article, table...).
+    """
+
+    _MISSING = object()
 
-class OrderService:
     def __init__(self):
+        self._changes: List[tuple] = []
+
+    @staticmethod
+    def assign(container: Dict[str, Any], key: str, value: Any) -> None:
+        container[key] = value
+
+    def put(self, container: Dict[str, Any], key: str, value: Any) -> None:
+        self._changes.append((container, key, container.get(key, self._MISSING)))
+        container[key] = value
+
+    def undo(self) -> None:
+        """Remet les valeurs d'avant, dans l'ordre inverse"""
+        for container, key, previous in reversed(self._changes):
+            if previous is self._MISSING:
+                del container[key]
+            else:
+                container[key] = previous
+        self._changes.clear()
+
+class TableHandle:
+    """Accès à la commande d'une table depuis un terminal
+
+    Chaque table a son propre verrou : plusieurs terminaux peuvent saisir
+    en parallèle sur des tables différentes, et les modifications d'une
+    même table sont sérialisées. `with handle:` garde le verrou le temps
+    de plusieurs opérations (lecture cohérente de la commande, etc.).
+    `version` augmente à chaque modification : les terminaux distants
+    ignorent un état plus ancien que celui qu'ils ont déjà.
+    """
+
+    def __init__(self, service: 'OrderService', table: str):
+        self.service = service
+        self.table = table
+        self.lock = threading.RLock()
+        self.version = 0
+
+    def __enter__(self) -> 'TableHandle':
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.lock.release()
+
+    @property
+    def order(self) -> Order:
+        """Commande en cours (à modifier sous le verrou de la table)"""
+        return self.service._order_for(self.table)
+
+    def add_item(self, name: str, price: float, tva_rate: float, category: str,
+                 quantity: int = 1) -> None:
+        item = OrderItem(name=name, price=price, quantity=quantity,
+                         tva_rate=tva_rate, category=category)
+        with self.lock:
+            order = self.order
+            if not order.items:
+                # La table s'ouvre avec son premier article
+                order.created_at = datetime.now()
+            self._log("add", {
+                "name": name, "price": item.price, "quantity": quantity,
+                "tva_rate": tva_rate, "category": category,
+                "opened": order.created_at.isoformat()
+            }, lambda: order.add_item(item))
+        self.service._notify("item_added", self.table, name)
+
+    def remove_item(self, item_name: str) -> None:
+        with self.lock:
+            order = self.order
+            self._log("remove", {"name": item_name},
+                      lambda: order.remove_item(item_name))
+        self.service._notify("item_removed", self.table, item_name)
+
+    def update_quantity(self, item_name: str, delta: int) -> None:
+        with self.lock:
+            order = self.order
+            self._log("quantity", {"name": item_name, "delta": delta},
+                      lambda: order.update_quantity(item_name, delta))
+        self.service._notify("quantity_changed", self.table, item_name)
+
+    def mark_sent(self, changes: Optional[List[OrderItem]] = None) -> None:
+        """Enregistre les variations imprimées (toute la commande par défaut) comme envoyées"""
+        with self.lock:
+            order = self.order
+            data = None if changes is None else {
+                "changes": [change.to_dict() for change in changes]}
+            self._log("sent", data, lambda: order.mark_sent(changes))
+        self.service._notify("order_sent", self.table)
+
+    def _log(self, event: str, data: Optional[Dict[str, Any]],
+             apply: Callable[[], None]) -> None:
+        self.version += 1
+        self.service._log(self.table, event, data, apply)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Instantané versionné de la commande, état d'envoi en préparation compris"""
+        with self.lock:
+            data = self.order.to_dict(with_sent=True)
+            data["version"] = self.version
+            return data
+
+    def close(self, payment_method: Optional[str] = None) -> Order:
+        """Détache la commande de la table (qui repart vide) et la retourne
+
+        Avec `payment_method`, la commande est notée en attente de paiement
+        dans le journal des tables jusqu'à ce que la vente soit enregistrée.
+        """
+        with self.lock:
+            order = self.order
+            data = None
+            if payment_method is not None:
+                data = {"order": order.to_dict(), "payment_method": payment_method}
+            self._log("close", data,
+                      lambda: self.service._replace_order(self.table, Order(table=self.table)))
+        self.service._notify("order_cleared", self.table)
+        return order
+
+    def pay(self, payment_method: str) -> Order:
+        """Encaisse la table de façon atomique et retourne la commande payée
+
+        La commande est détachée sous le verrou de la table, puis la vente
+        est enregistrée ; en cas d'échec elle est remise sur la table.
+        L'écriture de la vente étant tout ou rien (`OrderService._write`),
+        rien n'en reste en mémoire ni sur disque.
+        """
+        with self.lock:
+            if not self.order.items:
+                raise ValueError("Aucun article dans la commande")
+            order = self.close(payment_method)
+        try:
+            self.service.settle_order(order, payment_method)
+        except Exception:
+            self._restore(order)
+            raise
+        return order
+
+    def _restore(self, order: Order) -> None:
+        """Remet sur la table une commande dont le paiement a échoué
+
+        Les quantités déjà envoyées en préparation et l'heure d'ouverture
+        sont conservées : le prochain ticket n'envoie que les nouveautés.
+        """
+        with self.lock:
+            current = self.order
+            self._log("restore", {"order": order.to_dict(with_sent=True)},
+                      lambda: current.merge(order))
+            self.service._payment_settled(order)
+        self.service._notify("order_restored", self.table)
+
+
+class OrderService:
+    def __init__(self, store: Optional[SalesStore] = None,
+                 committer: Optional[GroupCommitter] = None,
+                 printer_pool: Optional[PrinterPool] = None,
+                 io_worker: Optional[IOWorker] = None,
+                 table_journal: Optional[TableJournal] = None,
+                 registry: Optional[TableRegistry] = None):
         self.orders: Dict[str, Order] = {}
+        self._handles: Dict[str, TableHandle] = {}
+        self._orders_lock = threading.Lock()
+        # Table affichée par l'interface locale ; les autres terminaux passent par table()
         self.current_table = "Table 1"
+        if store is None:
+            storage_config = ConfigLoader.load_storage_config()
+            store = create_store(storage_config)
+            if table_journal is None:
+                table_journal = TableJournal(storage_config.get("data_dir", "."),
+                                             fsync=storage_config.get("fsync", "always"))
+            group_commit = storage_config.get("group_commit", {})
+            if committer is None and group_commit.get("enabled", False):
+                committer = GroupCommitter(
+                    store,
+                    max_delay=group_commit.get("max_delay_ms", 5) / 1000,
+                    max_batch=group_commit.get("max_batch", 64)
+                )
+        self.store = store
+        self.committer = committer
+        self.printer_config = ConfigLoader.load_printer_config()
+        self.printer_pool = printer_pool if printer_pool is not None else PrinterPool()
+        self._io_worker = io_worker
+        self._sales_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._listeners: List[Callable[[str, str, Any], None]] = []
         self.daily_sales = self._load_daily_sales()
+
+        # Plan des tables et index des tables ouvertes
+        if registry is None:
+            registry = TableRegistry.from_config(ConfigLoader.load_tables_config())
+        self.registry = registry
+
+        # Tables ouvertes retrouvées après un arrêt (journal + dernier instantané)
+        self.table_journal = table_journal
+        self._journal_lock = threading.Lock()
+        self._pending_payments: Dict[str, Dict[str, Any]] = {}
+        if table_journal is not None:
+            self.orders, self._pending_payments = table_journal.recover()
+            self._resume_payments()
+            with self._journal_lock:
+                table_journal.snapshot(self.orders, self._pending_payments)
+            registry.load(self.orders)
+
+    def _log(self, table: str, event: str, data: Optional[Dict[str, Any]],
+             apply: Callable[[], None]) -> None:
+        """Applique une modification de table et l'ajoute au journal des tables
+
+        L'application et l'ajout se font sous le même verrou, si bien qu'un
+        instantané ne contient jamais une modification absente du journal.
+        L'index des tables ouvertes du registre est ensuite mis à jour.
+        """
+        if self.table_journal is None:
+            apply()
+        else:
+            with self._journal_lock:
+                apply()
+                if event == "close" and data is not None:
+                    self._pending_payments[payment_key(data["order"])] = data
+                if self.table_journal.record(table, event, data):
+                    self.table_journal.snapshot(self.orders, self._pending_payments)
+        if event != "settled":
+            self.registry.update(table, self.orders[table])
+
+    def _payment_settled(self, order: Order) -> None:
+        """Retire un paiement de la liste d'attente du journal des tables"""
+        if self.table_journal is None:
+            return
+        key = payment_key(order.to_dict())
+        self._log(order.table, "settled", {"key": key},
+                  lambda: self._pending_payments.pop(key, None))
+
+    def _resume_payments(self) -> None:
+        """Termine les paiements interrompus par un arrêt brutal
+
+        Une vente absente du stockage est encaissée à nouveau. Une vente déjà
+        enregistrée mais dont la transaction manque au journal du jour, ou
+        n'est pas encore comptée dans l'instantané des totaux (arrêt entre
+        l'écriture des journaux et celle de l'instantané), est ajoutée aux
+        totaux du jour.
+        """
+        if not self._pending_payments:
+            return
+        transactions: Optional[List[Dict[str, Any]]] = None
+        counted = self.daily_sales["nombre_transactions"]
+        for key, pending in list(self._pending_payments.items()):
+            order = Order.from_dict(pending["order"])
+            opened = pending["order"]["created_at"]
+            date = order.created_at.strftime("%Y-%m-%d")
+            already_saved = any(
+                sale.get("created_at") == opened
+                for sale in self.store.iter_sales(date, date, order.table)
+            )
+            if not already_saved:
+                print(f"Reprise du paiement interrompu : {order.table} ({order.total:.2f}€)")
+                self.settle_order(order, pending["payment_method"])
+                continue
+
+            # Journal du jour lu seulement si une vente enregistrée est à vérifier
+            if transactions is None:
+                transactions = list(self.store.iter_transactions(self.daily_sales["date"]))
+            position = next((i for i, transaction in enumerate(transactions)
+                             if transaction.get("table") == order.table
+                             and transaction.get("ouverture") == opened), None)
+            if position is None or position >= counted:
+                print(f"Reprise des totaux du paiement interrompu : {order.table} "
+                      f"({order.total:.2f}€)")
+                order.payment_method = pending["payment_method"]
+                order.is_paid = True
+                self._record_sale(order, save_sale=False,
+                                  append_transaction=position is None)
+            self._pending_payments.pop(key)
     
+    def subscribe(self, listener: Callable[[str, str, Any], None]) -> Callable[[], None]:
+        """Abonne une fonction aux changements de commande
+
+        Le listener reçoit `(événement, table, données)` ; les événements
+        sont "item_added", "item_removed", "quantity_changed",
+        "order_cleared", "order_restored", "order_sent" et "table_switched".
+        Retourne la fonction de désabonnement.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self, event: str, table: str, data: Any = None) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event, table, data)
+            except Exception as e:
+                print(f"Erreur listener {event}: {e}")
+
+    def table(self, table: str) -> TableHandle:
+        """Retourne le handle (unique) d'une table"""
+        with self._orders_lock:
+            handle = self._handles.get(table)
+            if handle is None:
+                handle = self._handles[table] = TableHandle(self, table)
+            return handle
+
+    def _order_for(self, table: str) -> Order:
+        with self._orders_lock:
+            order = self.orders.get(table)
+            if order is None:
+                order = self.orders[table] = Order(table=table)
+            return order
+
+    def _replace_order(self, table: str, order: Order) -> None:
+        with self._orders_lock:
+            self.orders[table] = order
+
+    def open_tables(self) -> List[str]:
+        """Tables ayant une commande en cours"""
+        return self.registry.open_tables()
+
     @property
     def current_order(self) -> Order:
-        if self.current_table not in self.orders:
-            self.orders[self.current_table] = Order(table=self.current_table)
-        return self.orders[self.current_table]
+        return self._order_for(self.current_table)
     
     def switch_table(self, table: str) -> None:
         self.current_table = table
+        self._notify("table_switched", table)
     
     def add_to_order(self, name: str, price: float, tva_rate: float, category: str) -> None:
-        item = OrderItem(name=name, price=price, tva_rate=tva_rate, category=category)
-        self.current_order.add_item(item)
+        self.table(self.current_table).add_item(name, price, tva_rate, category)
     
     def remove_from_order(self, item_name: str) -> None:
-        self.current_order.remove_item(item_name)
+        self.table(self.current_table).remove_item(item_name)
     
     def update_quantity(self, item_name: str, delta: int) -> None:
-        self.current_order.update_quantity(item_name, delta)
+        self.table(self.current_table).update_quantity(item_name, delta)
     
     def clear_current_order(self) -> None:
-        self.orders[self.current_table] = Order(table=self.current_table)
-    
-    def process_payment(self, payment_method: str) -> None:
-        self.current_order.payment_method = payment_method
-        self.current_order.is_paid = True
-        self.save_sale(self.current_order)
-        self.clear_current_order()
+        self.table(self.current_table).close()
+
+    def mark_sent(self, changes: Optional[List[OrderItem]] = None,
+                  table: Optional[str] = None) -> None:
+        """Marque les variations imprimées d'une table (la courante par défaut) comme envoyées"""
+        self.table(table or self.current_table).mark_sent(changes)
     
     def save_sale(self, order: Order) -> None:
-        # Créer le dossier du mois si nécessaire
-        now = datetime.now()
-        month_fr = [
-            "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-            "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"
-        ][now.month - 1]
-        
-        folder_name = f"Vente {month_fr} {now.year}"
-        os.makedirs(folder_name, exist_ok=True)
-        
-        # Charger les ventes existantes ou créer une nouvelle liste
-        sales_file = os.path.join(folder_name, "vente.json")
-        sales = []
-        
-        if os.path.exists(sales_file):
-            try:
-                with open(sales_file, 'r', encoding='utf-8') as f:
-                    sales = json.load(f)
-            except:
-                sales = []
-        
-        # Ajouter la nouvelle vente
-        sales.append(order.to_dict())
-        
-        # Sauvegarder
-        with open(sales_file, 'w', encoding='utf-8') as f:
-            json.dump(sales, f, ensure_ascii=False, indent=2)
-    
+        """Enregistre la vente dans le backend de stockage"""
+        self.store.save_sale(order.to_dict())
+
+    def iter_sales(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   table: Optional[str] = None,
+                   payment_method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Parcourt les ventes enregistrées au format Order.to_dict()"""
+        return self.store.iter_sales(date_from, date_to, table, payment_method)
+
     def get_tables(self) -> List[str]:
-        return [f"Table {i}" for i in range(1, 21)] + ["À emporter", "Comptoir"]
+        return self.registry.tables()
 
     def _load_daily_sales(self) -> Dict[str, any]:
         """Charge les ventes du jour"""
         today_str = datetime.now().strftime("%Y-%m-%d")
-        sales_file = f"ventes_jour_{today_str}.json"
+        daily_sales = self.store.load_daily_sales(today_str)
+        if daily_sales is not None:
+            return daily_sales
 
-        if os.path.exists(sales_file):
-            try:
-                with open(sales_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+        return self._empty_daily_sales(today_str)
 
-        # Structure initiale pour les ventes du jour
+    @staticmethod
+    def _empty_daily_sales(date: str) -> Dict[str, any]:
+        """Structure initiale des totaux du jour
+
+        Les transactions ne sont pas conservées ici : elles sont ajoutées au
+        journal du jour, ce qui garde l'instantané des totaux de taille bornée
+        (cumuls par article, catégorie, heure et table compris).
+        """
         return {
-            "date": today_str,
+            "date": date,
             "total_ventes_ht": 0.0,
             "total_ventes_ttc": 0.0,
             "total_tva": 0.0,
             "ventes_par_taux": {},
             "nombre_transactions": 0,
             "ventes_par_moyen_paiement": {},
-            "transactions": []
+            "ventes_par_article": {},
+            "ventes_par_categorie": {},
+            "ventes_par_heure": {},
+            "ventes_par_table": {}
         }
 
-    def _save_daily_sales(self):
-        """Sauvegarde les ventes du jour"""
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        sales_file = f"ventes_jour_{today_str}.json"
+    def _write(self, write: Callable[[], None],
+               rollback: Optional[Callable[[], None]] = None) -> None:
+        """Exécute une écriture durable, groupée avec d'autres si possible
+
+        `rollback` annule l'état en mémoire de l'écriture si elle est abandonnée.
+        """
+        if self.committer is not None:
+            self.committer.write(write, rollback)
+        else:
+            with self._write_lock:
+                try:
+                    # Tout ou rien : une commande remise sur la table après un
+                    # échec ne doit laisser aucune vente enregistrée
+                    with self.store.savepoint():
+                        write()
+                except Exception:
+                    if rollback is not None:
+                        rollback()
+                    raise
+
+    def _publish_daily_sales(self, daily: Dict[str, any],
+                             published: List[Dict[str, any]]) -> None:
+        """Remplace les totaux du jour en mémoire, une fois leur écriture faite
+
+        Les totaux remplacés sont gardés dans `published` pour `_unpublish`.
+        """
+        with self._sales_lock:
+            published.append(self.daily_sales)
+            self.daily_sales = daily
+
+    def _unpublish(self, published: List[Dict[str, any]]) -> Callable[[], None]:
+        """Annulation d'une écriture : remet les totaux du jour d'avant"""
+        def rollback() -> None:
+            if published:
+                with self._sales_lock:
+                    self.daily_sales = published.pop()
+        return rollback
+
+    def close(self) -> None:
+        """Termine les écritures en file (ventes, journal des tables) avant l'arrêt"""
+        if self._io_worker is not None:
+            self._io_worker.close()
+        if self.committer is not None:
+            self.committer.close()
+        if self.table_journal is not None:
+            self.table_journal.close()
 
-        with open(sales_file, 'w', encoding='utf-8') as f:
-            json.dump(self.daily_sales, f, ensure_ascii=False, indent=2)
+    @property
+    def io_worker(self) -> IOWorker:
+        """Thread d'écriture en arrière-plan, créé au premier usage"""
+        if self._io_worker is None:
+            self._io_worker = IOWorker()
+        return self._io_worker
+
+    def close_order(self, payment_method: Optional[str] = None) -> Order:
+        """Retire la commande de la table courante (en mémoire) et la retourne"""
+        return self.table(self.current_table).close(payment_method)
 
     def process_payment(self, payment_method: str) -> None:
-        self.current_order.payment_method = payment_method
-        self.current_order.is_paid = True
+        """Encaisse la table courante ; en cas d'échec la commande y est remise"""
+        self.table(self.current_table).pay(payment_method)
+
+    def process_payment_async(self, payment_method: str,
+                              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """Libère la table immédiatement et enregistre la vente en arrière-plan
+
+        Le Future retourne la commande encaissée une fois la vente durable.
+        Si l'écriture échoue, la commande est remise sur sa table (comme
+        `TableHandle.pay`) avant l'appel de `callback`.
+        """
+        handle = self.table(self.current_table)
+        order = handle.close(payment_method)
+
+        def task() -> Order:
+            self.settle_order(order, payment_method)
+            return order
+
+        def on_done(future: Future) -> None:
+            if future.exception() is not None:
+                handle._restore(order)
+            if callback is not None:
+                callback(future)
+
+        return self.io_worker.submit(task, on_done)
+
+    def settle_order(self, order: Order, payment_method: str) -> None:
+        """Encaisse une commande et attend que la vente soit durable"""
+        if self.table_journal is not None:
+            # La clôture en attente de paiement doit être sur disque avant la
+            # vente : sinon un arrêt brutal rouvrirait une table déjà encaissée
+            self.table_journal.flush()
+        order.payment_method = payment_method
+        order.is_paid = True
+        self._record_sale(order)
+        self._payment_settled(order)
+
+    def _record_sale(self, order: Order, save_sale: bool = True,
+                     append_transaction: bool = True) -> None:
+        """Écrit une vente payée et l'ajoute aux totaux du jour, tout ou rien
+
+        La reprise après un arrêt passe `save_sale` ou `append_transaction` à
+        False pour ne compléter que ce qui manque.
+        """
+        undo = _UndoLog()
+
+        def write():
+            # Les statistiques sont calculées dans l'ordre des écritures, ce qui
+            # garde chaque vente du bon côté d'un rapport Z. Elles sont modifiées
+            # en place, et un échec retire la vente grâce aux valeurs notées
+            with self._sales_lock:
+                daily = self.daily_sales
+                transaction = self._update_daily_sales(daily, order, undo)
+            try:
+                if save_sale:
+                    self.save_sale(order)
+                if append_transaction:
+                    self.store.append_transaction(daily["date"], transaction)
+                self.store.save_daily_sales(daily)  # Sauvegarder après chaque vente
+            except BaseException:
+                self._undo_sale(undo)
+                raise
+
+        self._write(write, lambda: self._undo_sale(undo))
+
+    def _undo_sale(self, undo: _UndoLog) -> None:
+        """Retire des totaux du jour une vente dont l'écriture a échoué"""
+        with self._sales_lock:
+            undo.undo()
+
+    def _update_daily_sales(self, daily: Dict[str, any], order: Order,
+                            undo: Optional[_UndoLog] = None) -> Dict[str, any]:
+        """Ajoute une vente aux totaux `daily` et retourne la transaction"""
+        self._accumulate_sale(daily, order, undo)
+
+        return {
+            "heure": datetime.now().strftime("%H:%M:%S"),
+            "table": order.table,
+            # Heure d'ouverture : relie la transaction à la vente à la reprise
+            "ouverture": order.created_at.isoformat(),
+            "montant": order.total,
+            "moyen_paiement": order.payment_method
+        }
 
-        # Mettre à jour les statistiques du jour
-        self._update_daily_sales(self.current_order)
+    @staticmethod
+    def _accumulate_sale(daily: Dict[str, any], order: Order,
+                         undo: Optional[_UndoLog] = None) -> None:
+        """Ajoute une vente aux totaux d'une journée
 
-        self.save_sale(self.current_order)
-        self.clear_current_order()
-        self._save_daily_sales()  # Sauvegarder après chaque vente
+        Avec `undo`, chaque valeur remplacée y est notée pour pouvoir
+        retirer la vente ensuite.
+        """
+        put = undo.put if undo is not None else _UndoLog.assign
 
-    def _update_daily_sales(self, order: Order):
-        """Met à jour les statistiques des ventes du jour"""
         # Compter la transaction
-        self.daily_sales["nombre_transactions"] += 1
+        put(daily, "nombre_transactions", daily["nombre_transactions"] + 1)
 
-        # Ajouter aux totaux
+        # Ajouter aux totaux (montants exacts au centime : arrondi après chaque somme)
         tva_summary = order.tva_summary
-        total_ht = sum(summary["ht"] for summary in tva_summary.values())
+        total_ttc = order.total
+        total_ht = order.total_ht
 
-        self.daily_sales["total_ventes_ht"] += total_ht
-        self.daily_sales["total_ventes_ttc"] += order.total
-        self.daily_sales["total_tva"] += (order.total - total_ht)
+        put(daily, "total_ventes_ht", _add_cents(daily["total_ventes_ht"], total_ht))
+        put(daily, "total_ventes_ttc", _add_cents(daily["total_ventes_ttc"], total_ttc))
+        put(daily, "total_tva", _add_cents(daily["total_tva"], order.total_tva))
 
         # Ventes par taux de TVA
         for taux, details in tva_summary.items():
-            if str(taux) not in self.daily_sales["ventes_par_taux"]:
-                self.daily_sales["ventes_par_taux"][str(taux)] = {
-                    "ht": 0.0,
-                    "tva": 0.0,
-                    "ttc": 0.0
-                }
-            self.daily_sales["ventes_par_taux"][str(taux)]["ht"] += details["ht"]
-            self.daily_sales["ventes_par_taux"][str(taux)]["tva"] += details["tva"]
-            self.daily_sales["ventes_par_taux"][str(taux)]["ttc"] += details["ttc"]
+            rate_totals = daily["ventes_par_taux"].get(str(taux))
+            if rate_totals is None:
+                rate_totals = {"ht": 0.0, "tva": 0.0, "ttc": 0.0}
+                put(daily["ventes_par_taux"], str(taux), rate_totals)
+            for key in ("ht", "tva", "ttc"):
+                put(rate_totals, key, _add_cents(rate_totals[key], details[key]))
 
         # Ventes par moyen de paiement
-        if order.payment_method not in self.daily_sales["ventes_par_moyen_paiement"]:
-            self.daily_sales["ventes_par_moyen_paiement"][order.payment_method] = 0.0
-        self.daily_sales["ventes_par_moyen_paiement"][order.payment_method] += order.total
-
-        # Ajouter la transaction à l'historique
-        self.daily_sales["transactions"].append({
-            "heure": datetime.now().strftime("%H:%M:%S"),
-            "table": order.table,
-            "montant": order.total,
-            "moyen_paiement": order.payment_method
-        })
+        payments = daily["ventes_par_moyen_paiement"]
+        put(payments, order.payment_method,
+            _add_cents(payments.get(order.payment_method, 0.0), total_ttc))
+
+        # Cumuls par article, catégorie, heure et table (coût constant par ligne) ;
+        # l'heure est celle de l'ouverture de la commande, connue aussi de replay_day.
+        # Les instantanés enregistrés avant ces cumuls n'ont pas ces clés
+        rollups = {}
+        for name in ("ventes_par_article", "ventes_par_categorie",
+                     "ventes_par_heure", "ventes_par_table"):
+            rollup = daily.get(name)
+            if rollup is None:
+                rollup = {}
+                put(daily, name, rollup)
+            rollups[name] = rollup
+
+        for item in order.items:
+            amount = item.total
+            for rollup, key in ((rollups["ventes_par_article"], item.name),
+                                (rollups["ventes_par_categorie"], item.category)):
+                entry = rollup.get(key)
+                if entry is None:
+                    entry = {"quantite": 0, "montant": 0.0}
+                    put(rollup, key, entry)
+                put(entry, "quantite", entry["quantite"] + item.quantity)
+                put(entry, "montant", _add_cents(entry["montant"], amount))
+
+        for rollup, key in ((rollups["ventes_par_heure"], f"{order.created_at.hour:02d}"),
+                            (rollups["ventes_par_table"], order.table)):
+            entry = rollup.get(key)
+            if entry is None:
+                entry = {"transactions": 0, "montant": 0.0}
+                put(rollup, key, entry)
+            put(entry, "transactions", entry["transactions"] + 1)
+            put(entry, "montant", _add_cents(entry["montant"], total_ttc))
+
+    def replay_day(self, date: str) -> Dict[str, any]:
+        """Recalcule les totaux d'une journée (YYYY-MM-DD) à partir des ventes enregistrées"""
+        daily = self._empty_daily_sales(date)
+        for sale in self.store.iter_sales(date, date):
+            self._accumulate_sale(daily, Order.from_dict(sale))
+        return daily
 
     def generate_z_report(self) -> Dict[str, any]:
         """Génère le rapport Z du jour"""
         today = datetime.now()
-        report = {
-            "type": "RAPPORT_Z",
-            "date_emission": today.strftime("%Y-%m-%d %H:%M:%S"),
-            "date_comptable": today.strftime("%Y-%m-%d"),
-            "numero_rapport": self._get_next_report_number(),
-            **self.daily_sales  # Inclut toutes les données du jour
-        }
-
-        # Sauvegarder le rapport Z
-        self._save_z_report(report)
-
-        # Réinitialiser les ventes du jour pour le prochain rapport
-        self._reset_daily_sales()
-
+        report = {}
+        published: List[Dict[str, any]] = []
+
+        def write():
+            with self._sales_lock:
+                daily = self.daily_sales
+            report.update({
+                "type": "RAPPORT_Z",
+                "date_emission": today.strftime("%Y-%m-%d %H:%M:%S"),
+                "date_comptable": today.strftime("%Y-%m-%d"),
+                "numero_rapport": self._get_next_report_number(),
+                **daily,  # Inclut toutes les données du jour
+                "transactions": list(self.store.iter_transactions(daily["date"]))
+            })
+
+            # Sauvegarder le rapport Z
+            self._save_z_report(report)
+            self.store.close_transactions(daily["date"], report["numero_rapport"])
+
+            # Réinitialiser les ventes du jour pour le prochain rapport
+            fresh = self._empty_daily_sales(datetime.now().strftime("%Y-%m-%d"))
+            self.store.save_daily_sales(fresh)
+            self._publish_daily_sales(fresh, published)
+
+        self._write(write, self._unpublish(published))
         return report
 
+    def generate_z_report_async(self,
+                                callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """Génère le rapport Z en arrière-plan, après les ventes déjà soumises"""
+        return self.io_worker.submit(self.generate_z_report, callback)
+
     def _get_next_report_number(self) -> int:
         """Retourne le prochain numéro de rapport"""
-        try:
-            with open("dernier_rapport.txt", "r") as f:
-                last_number = int(f.read().strip())
-        except:
-            last_number = 0
+        return self.store.next_counter("rapport_z")
 
-        next_number = last_number + 1
-
-        with open("dernier_rapport.txt", "w") as f:
-            f.write(str(next_number))
-
-        return next_number
+    def next_ticket_number(self) -> int:
+        """Retourne le prochain numéro de ticket (clé de déduplication du spool)"""
+        return self.store.next_counter("ticket")
 
     def _save_z_report(self, report: Dict[str, any]):
         """Sauvegarde le rapport Z"""
-        reports_dir = "rapports_z"
-        os.makedirs(reports_dir, exist_ok=True)
-
-        filename = f"rapport_z_{report['numero_rapport']:04d}_{report['date_comptable']}.json"
-        filepath = os.path.join(reports_dir, filename)
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
-
-    def _reset_daily_sales(self):
-        """Réinitialise les ventes du jour après un rapport Z"""
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        self.daily_sales = {
-            "date": today_str,
-            "total_ventes_ht": 0.0,
-            "total_ventes_ttc": 0.0,
-            "total_tva": 0.0,
-            "ventes_par_taux": {},
-            "nombre_transactions": 0,
-            "ventes_par_moyen_paiement": {},
-            "transactions": []
-        }
-        self._save_daily_sales()
+        self.store.save_z_report(report)
 
     def get_current_day_summary(self) -> Dict[str, any]:
         """Retourne le résumé des ventes du jour en cours"""
-        return self.daily_sales.copy()
+        with self._sales_lock:
+            return copy.deepcopy(self.daily_sales)
 
     def print_z_report(self, report: Dict[str, any]):
         """Imprime le rapport Z"""
@@ -221,64 +682,13 @@ class OrderService:
             return
 
         try:
-            import socket
-
-            printer_config = self.printer_config["receipt_printer"]
-            ip = printer_config["ip"]
-            port = printer_config["port"]
-
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            sock.connect((ip, port))
-
             content = self._generate_z_report_content(report)
-            sock.sendall(content.encode('utf-8'))
-            sock.close()
+            self.printer_pool.send("receipt_printer", self.printer_config["receipt_printer"],
+                                   content)
 
         except Exception as e:
             print(f"Erreur impression rapport Z: {e}")
 
-    def _generate_z_report_content(self, report: Dict[str, any]) -> str:
+    def _generate_z_report_content(self, report: Dict[str, any]) -> bytes:
         """Génère le contenu ESC/POS pour le rapport Z"""
-        content = []
-
-        content.append("\x1B\x40")  # Initialize printer
-        content.append("\x1B\x61\x01")  # Center align
-        content.append("\x1B\x21\x30")  # Double height and width
-        content.append("RAPPORT Z\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append("LA MEDUSA\n")
-        content.append("-----------------------------\n")
-        content.append(f"N°: {report['numero_rapport']:04d}\n")
-        content.append(f"Date: {report['date_emission']}\n")
-        content.append("-----------------------------\n")
-
-        # Totaux
-        content.append("\x1B\x21\x10")  # Emphasized
-        content.append("TOTAL GENERAL\n")
-        content.append("\x1B\x21\x00")  # Normal text
-        content.append(f"HT:   {report['total_ventes_ht']:10.2f}€\n")
-        content.append(f"TVA:  {report['total_tva']:10.2f}€\n")
-        content.append(f"TTC:  {report['total_ventes_ttc']:10.2f}€\n")
-        content.append(f"Transactions: {report['nombre_transactions']:4d}\n")
-        content.append("-----------------------------\n")
-
-        # Détail TVA
-        content.append("DETAIL TVA\n")
-        for taux, details in report['ventes_par_taux'].items():
-            content.append(f"TVA {taux}%: {details['ttc']:8.2f}€\n")
-
-        content.append("-----------------------------\n")
-
-        # Moyens de paiement
-        content.append("MOYENS DE PAIEMENT\n")
-        for moyen, montant in report['ventes_par_moyen_paiement'].items():
-            content.append(f"{moyen:<15} {montant:8.2f}€\n")
-
-        content.append("-----------------------------\n")
-        content.append("\x1B\x61\x01")  # Center align
-        content.append("*** RAPPORT Z ***\n")
-        content.append("Fin de rapport\n\n\n")
-        content.append("\x1D\x56\x00")  # Cut paper
-
-        return "".join(content)
\ No newline at end of file
+        return template_for(self.printer_config["receipt_printer"]).z_report(report)
@@ -0,0 +1,279 @@
+import base64
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.services.callback_queue import CallbackQueue
+from app.services.printer import PrinterPool
+
+
+class PrintJob:
+    """Ticket à envoyer à une imprimante"""
+
+    PENDING = "en attente"
+    DONE = "imprimé"
+    FAILED = "erreur"
+    RETRYING = "en file (nouvel essai)"
+
+    _ids = itertools.count(1)
+
+    def __init__(self, printer_name: str, printer_config: Dict[str, Any], data: bytes,
+                 label: str = "", ticket_number: Optional[int] = None, durable: bool = False):
+        self.id = next(PrintJob._ids)
+        self.printer_name = printer_name
+        self.printer_config = printer_config
+        self.data = data
+        self.label = label or printer_config.get("name", printer_name)
+        self.ticket_number = ticket_number
+        # Un job durable est écrit dans le spool et réessayé jusqu'à acquittement
+        self.durable = durable
+        self.status = PrintJob.PENDING
+        self.error: Optional[Exception] = None
+        self.attempts = 0
+        self.created_at = time.time()
+
+    @property
+    def key(self) -> str:
+        """Identifiant de déduplication : numéro de ticket et destination"""
+        if self.ticket_number is None:
+            return f"job{self.id}-{self.printer_name}-{self.label}"
+        return f"{self.ticket_number:06d}-{self.printer_name}-{self.label}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "printer_name": self.printer_name,
+            "printer_config": self.printer_config,
+            "label": self.label,
+            "ticket_number": self.ticket_number,
+            "created_at": self.created_at,
+            "data": base64.b64encode(self.data).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PrintJob':
+        job = cls(data["printer_name"], data["printer_config"],
+                  base64.b64decode(data["data"]), data.get("label", ""),
+                  data.get("ticket_number"), durable=True)
+        job.created_at = data.get("created_at", job.created_at)
+        return job
+
+    def __repr__(self) -> str:
+        return f"PrintJob(id={self.id}, label={self.label!r}, status={self.status!r})"
+
+
+class PrintBatch:
+    """Ensemble de jobs envoyés en parallèle, un résultat par job"""
+
+    def __init__(self, jobs: Iterable[PrintJob]):
+        self.jobs: List[PrintJob] = list(jobs)
+        self._remaining = len(self.jobs)
+        self._lock = threading.Lock()
+
+    def _job_finished(self) -> bool:
+        with self._lock:
+            self._remaining -= 1
+            return self._remaining == 0
+
+    @property
+    def results(self) -> Dict[str, PrintJob]:
+        """Jobs indexés par libellé (CUISINE, BAR, Ticket caisse...)"""
+        return {job.label: job for job in self.jobs}
+
+    @property
+    def failed(self) -> List[PrintJob]:
+        return [job for job in self.jobs if job.status == PrintJob.FAILED]
+
+
+class PrintSpooler:
+    """File d'impression traitée par des threads de fond
+
+    Chaque imprimante a sa propre file et son propre thread : les tickets
+    d'une même imprimante sortent dans l'ordre, et les imprimantes sont
+    servies en parallèle, si bien qu'une imprimante lente ou hors ligne ne
+    retarde pas les autres. Les envois réseau ne bloquent jamais
+    l'appelant. Les callbacks de fin de job sont mis en file et exécutés
+    par `poll()`, que `attach()` appelle périodiquement depuis la boucle Tk
+    via `after()`.
+
+    Avec un `spool_dir`, les jobs durables sont écrits sur disque avant
+    d'être envoyés, réessayés avec un délai croissant jusqu'à ce que
+    l'imprimante les accepte, puis effacés. Au démarrage, les jobs restés
+    dans le spool sont remis en file. Un job dont la clé (numéro de ticket
+    et destination) est déjà en file ou imprimée n'est pas ajouté deux fois.
+    """
+
+    def __init__(self, pool: Optional[PrinterPool] = None, spool_dir: Optional[str] = None,
+                 retry_base: float = 1.0, retry_max: float = 30.0):
+        self.pool = pool if pool is not None else PrinterPool()
+        self.spool_dir = spool_dir
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lanes: Dict[str, "queue.Queue[Optional[tuple]]"] = {}
+        self._threads: List[threading.Thread] = []
+        self._lanes_lock = threading.Lock()
+        self._done = CallbackQueue("Erreur callback impression")
+        self._listeners: List[Callable[[PrintJob], None]] = []
+        self._keys: Dict[str, PrintJob] = {}
+        self._keys_lock = threading.Lock()
+        self._closing = threading.Event()
+
+        if spool_dir is not None:
+            os.makedirs(spool_dir, exist_ok=True)
+            self._resume()
+
+    def add_listener(self, listener: Callable[[PrintJob], None]) -> None:
+        """Abonne une fonction aux changements d'état des jobs durables (via poll)"""
+        self._listeners.append(listener)
+
+    def _spool_file(self, job: PrintJob) -> str:
+        return os.path.join(self.spool_dir, f"{job.key}.job")
+
+    def _persist(self, job: PrintJob) -> None:
+        """Écrit le job dans le spool (écriture atomique et durable)"""
+        spool_file = self._spool_file(job)
+        tmp_file = spool_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(job.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, spool_file)
+
+    def _acknowledge(self, job: PrintJob) -> None:
+        try:
+            os.remove(self._spool_file(job))
+        except OSError:
+            pass
+
+    def _resume(self) -> None:
+        """Remet en file les jobs restés dans le spool après un arrêt"""
+        jobs = []
+        for filename in os.listdir(self.spool_dir):
+            if not filename.endswith(".job"):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, filename), 'r', encoding='utf-8') as f:
+                    jobs.append(PrintJob.from_dict(json.load(f)))
+            except Exception as e:
+                print(f"Job d'impression illisible {filename}: {e}")
+        for job in sorted(jobs, key=lambda job: job.created_at):
+            with self._keys_lock:
+                self._keys[job.key] = job
+            self._lane(job.printer_name).put((job, None, None))
+
+    def _register(self, job: PrintJob) -> bool:
+        """Réserve la clé du job ; False si un job identique existe déjà"""
+        if job.ticket_number is None:
+            return True
+        with self._keys_lock:
+            if job.key in self._keys:
+                return False
+            self._keys[job.key] = job
+        return True
+
+    def _lane(self, printer_name: str) -> "queue.Queue[Optional[tuple]]":
+        with self._lanes_lock:
+            lane = self._lanes.get(printer_name)
+            if lane is None:
+                lane = self._lanes[printer_name] = queue.Queue()
+                thread = threading.Thread(target=self._work, args=(lane,),
+                                          name=f"print-spooler-{printer_name}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            return lane
+
+    def _enqueue(self, job: PrintJob, callback, batch) -> None:
+        if job.durable and self.spool_dir is not None:
+            self._persist(job)
+        self._lane(job.printer_name).put((job, callback, batch))
+
+    def submit(self, job: PrintJob,
+               callback: Optional[Callable[[PrintJob], None]] = None) -> PrintJob:
+        """Met un job en file et retourne immédiatement"""
+        if not self._register(job):
+            return self._keys[job.key]
+        self._enqueue(job, callback, None)
+        return job
+
+    def submit_batch(self, jobs: Iterable[PrintJob],
+                     callback: Optional[Callable[[PrintBatch], None]] = None) -> PrintBatch:
+        """Envoie des jobs en parallèle ; le callback reçoit le lot une fois tous terminés"""
+        batch = PrintBatch(job for job in jobs if self._register(job))
+        if not batch.jobs:
+            if callback is not None:
+                self._done.put(callback, batch)
+            return batch
+        for job in batch.jobs:
+            self._enqueue(job, callback, batch)
+        return batch
+
+    def _work(self, lane: "queue.Queue[Optional[tuple]]") -> None:
+        while True:
+            entry = lane.get()
+            if entry is None:
+                return
+            job, callback, batch = entry
+            while True:
+                job.attempts += 1
+                try:
+                    self.pool.send(job.printer_name, job.printer_config, job.data)
+                    job.status = PrintJob.DONE
+                    job.error = None
+                    break
+                except Exception as e:
+                    job.error = e
+                    print(f"Erreur impression {job.label}: {e}")
+                    if not (job.durable and self.spool_dir is not None):
+                        job.status = PrintJob.FAILED
+                        break
+                # Job durable : il reste dans le spool et sera réessayé
+                if job.status != PrintJob.RETRYING:
+                    job.status = PrintJob.RETRYING
+                    self._finish(job, callback, batch)
+                    callback = batch = None
+                delay = min(self.retry_base * 2 ** (job.attempts - 1), self.retry_max)
+                if self._closing.wait(delay):
+                    return
+
+            if job.durable and self.spool_dir is not None:
+                self._acknowledge(job)
+            self._finish(job, callback, batch)
+
+    def _finish(self, job: PrintJob, callback, batch) -> None:
+        """Signale la fin (ou la mise en attente) d'un job à l'appelant"""
+        if job.durable and self._listeners:
+            self._done.put(self._notify_listeners, job)
+        if callback is None:
+            return
+        if batch is None:
+            self._done.put(callback, job)
+        elif batch._job_finished():
+            self._done.put(callback, batch)
+
+    def _notify_listeners(self, job: PrintJob) -> None:
+        for listener in self._listeners:
+            listener(job)
+
+    def poll(self) -> None:
+        """Exécute les callbacks des jobs terminés (à appeler depuis le thread Tk)"""
+        self._done.poll()
+
+    def attach(self, root, interval_ms: int = 100) -> None:
+        """Livre les callbacks dans la boucle Tk toutes les `interval_ms`"""
+        self._done.attach(root, interval_ms)
+
+    def close(self) -> None:
+        """Arrête les threads ; les jobs durables non imprimés restent dans le spool"""
+        self._done.detach()
+        self._closing.set()
+        with self._lanes_lock:
+            lanes = list(self._lanes.values())
+            threads = list(self._threads)
+        for lane in lanes:
+            lane.put(None)
+        for thread in threads:
+            thread.join()
+        self.pool.close()
@@ -0,0 +1,150 @@
+import select
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+
+class PrinterUnavailable(Exception):
+    """Imprimante injoignable (en attente de reconnexion ou saturée)"""
+
+
+class _PrinterEndpoint:
+    """Connexions ouvertes vers une imprimante et état de reconnexion"""
+
+    def __init__(self, name: str, config: Dict[str, Any], pool: "PrinterPool"):
+        self.name = name
+        self.config = config
+        self.pool = pool
+        self.idle: List[Tuple[socket.socket, float]] = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(config.get("max_connections", pool.max_connections))
+        self.failures = 0
+        self.retry_at = 0.0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.config["ip"], self.config["port"]
+
+    @property
+    def timeout(self) -> float:
+        return self.config.get("timeout", 5)
+
+    def _connect(self) -> socket.socket:
+        now = time.monotonic()
+        with self.lock:
+            if now < self.retry_at:
+                raise PrinterUnavailable(
+                    f"{self.name}: nouvelle tentative dans {self.retry_at - now:.1f}s"
+                )
+        try:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+        except OSError:
+            with self.lock:
+                self.failures += 1
+                delay = min(self.pool.backoff_base * 2 ** (self.failures - 1),
+                            self.pool.backoff_max)
+                self.retry_at = time.monotonic() + delay
+            raise
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        with self.lock:
+            self.failures = 0
+            self.retry_at = 0.0
+        return sock
+
+    @staticmethod
+    def _is_healthy(sock: socket.socket) -> bool:
+        """Vérifie sans bloquer qu'une connexion inactive n'a pas été fermée"""
+        try:
+            readable, _, errored = select.select([sock], [], [sock], 0)
+            if errored:
+                return False
+            if readable:
+                # Octets d'état envoyés par l'imprimante, ignorés ; b"" = connexion fermée
+                return sock.recv(1024) != b""
+            return True
+        except OSError:
+            return False
+
+    def _checkout(self) -> socket.socket:
+        now = time.monotonic()
+        with self.lock:
+            while self.idle:
+                sock, last_used = self.idle.pop()
+                if now - last_used <= self.pool.idle_timeout and self._is_healthy(sock):
+                    return sock
+                sock.close()
+        return self._connect()
+
+    def _checkin(self, sock: socket.socket) -> None:
+        with self.lock:
+            self.idle.append((sock, time.monotonic()))
+
+    def send(self, data: bytes) -> None:
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PrinterUnavailable(f"{self.name}: trop de connexions simultanées")
+        try:
+            sock = self._checkout()
+            try:
+                sock.sendall(data)
+            except OSError:
+                # Connexion conservée mais coupée par l'imprimante : un seul nouvel essai
+                sock.close()
+                sock = self._connect()
+                try:
+                    sock.sendall(data)
+                except OSError:
+                    sock.close()
+                    raise
+            self._checkin(sock)
+        finally:
+            self.slots.release()
+
+    def close(self) -> None:
+        with self.lock:
+            for sock, _ in self.idle:
+                sock.close()
+            self.idle = []
+
+
+class PrinterPool:
+    """Pool de connexions persistantes vers les imprimantes ESC/POS
+
+    Les connexions sont indexées par nom d'imprimante (clés de
+    printer_config.json), gardées ouvertes entre deux tickets, vérifiées
+    avant réutilisation et rouvertes avec un délai exponentiel après un
+    échec. Le nombre de connexions simultanées par imprimante est limité
+    (`max_connections`, 1 par défaut car la plupart des imprimantes
+    n'acceptent qu'un client à la fois).
+    """
+
+    def __init__(self, max_connections: int = 1, idle_timeout: float = 30.0,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._endpoints: Dict[str, _PrinterEndpoint] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, printer_name: str, printer_config: Dict[str, Any]) -> _PrinterEndpoint:
+        with self._lock:
+            endpoint = self._endpoints.get(printer_name)
+            if endpoint is not None and endpoint.config != printer_config:
+                # Configuration modifiée (IP, port...) : on repart de zéro
+                endpoint.close()
+                endpoint = None
+            if endpoint is None:
+                endpoint = _PrinterEndpoint(printer_name, dict(printer_config), self)
+                self._endpoints[printer_name] = endpoint
+            return endpoint
+
+    def send(self, printer_name: str, printer_config: Dict[str, Any], data: bytes) -> None:
+        """Envoie un ticket en réutilisant une connexion ouverte si possible"""
+        self._endpoint(printer_name, printer_config).send(data)
+
+    def close(self) -> None:
+        with self._lock:
+            for endpoint in self._endpoints.values():
+                endpoint.close()
+            self._endpoints = {}
@@ -0,0 +1,259 @@
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.order import Order, OrderItem
+from app.services.callback_queue import CallbackQueue
+from app.services.order_api import APIError
+from app.services.table_registry import TableRegistry, TableStatus
+
+
+class RemoteOrderService:
+    """Terminal léger connecté à un `OrderServer`
+
+    Offre à l'interface les mêmes méthodes qu'OrderService (table courante,
+    ajout d'article, paiement, rapports...) mais les exécute sur le
+    serveur. Les tables sont gardées en miroir : une modification locale
+    est appliquée tout de suite au miroir puis envoyée, et l'état poussé
+    par le serveur après chaque changement (de ce terminal ou d'un autre)
+    remplace le miroir. Les états reçus (événements et ouverture de
+    table) sont appliqués dans le thread de lecture, dans l'ordre
+    d'arrivée, et un état dont la version est plus ancienne que celle du
+    miroir est ignoré. Les notifications et les callbacks sont livrés
+    par `poll()`, appelé depuis la boucle Tk par `attach()`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8766, timeout: float = 10.0):
+        self.timeout = timeout
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.settimeout(None)
+        self._file = self._sock.makefile('rwb')
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._done = CallbackQueue("Erreur callback serveur")
+        self._listeners: List[Callable[[str, str, Any], None]] = []
+        self._registry: Optional[TableRegistry] = None
+        self._closed = False
+
+        self.orders: Dict[str, Order] = {}
+        self._versions: Dict[str, int] = {}
+        self.current_table = "Table 1"
+
+        self._reader = threading.Thread(target=self._read, name="remote-order-service",
+                                        daemon=True)
+        self._reader.start()
+
+    # Transport
+
+    def _send(self, action: str, params: Dict[str, Any],
+              convert: Optional[Callable[[Any], Any]] = None,
+              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[request_id] = (future, convert, callback)
+        line = json.dumps({"id": request_id, "action": action, **params}, ensure_ascii=False)
+        try:
+            with self._send_lock:
+                self._file.write(line.encode('utf-8') + b"\n")
+                self._file.flush()
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(ConnectionError(f"Serveur injoignable: {e}"))
+            if callback is not None:
+                self._done.put(callback, future)
+        return future
+
+    def call(self, action: str, **params) -> Any:
+        """Exécute une action sur le serveur et attend son résultat"""
+        return self._send(action, params).result(self.timeout)
+
+    def _read(self) -> None:
+        try:
+            for line in self._file:
+                message = json.loads(line)
+                if "event" in message:
+                    self._on_event(message)
+                else:
+                    self._on_response(message)
+        except (OSError, ValueError) as e:
+            if not self._closed:
+                print(f"Connexion au serveur de commandes perdue: {e}")
+        # Connexion fermée : les requêtes en attente échouent
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, _, callback in pending.values():
+            future.set_exception(ConnectionError("Connexion au serveur fermée"))
+            if callback is not None:
+                self._done.put(callback, future)
+
+    def _on_response(self, message: Dict[str, Any]) -> None:
+        with self._pending_lock:
+            entry = self._pending.pop(message.get("id"), None)
+        if entry is None:
+            return
+        future, convert, callback = entry
+        if message["ok"]:
+            result = message["result"]
+            future.set_result(convert(result) if convert is not None else result)
+        else:
+            future.set_exception(APIError(message["error"]))
+        if callback is not None:
+            self._done.put(callback, future)
+
+    def _on_event(self, message: Dict[str, Any]) -> None:
+        table = message["table"]
+        self._apply_order(table, message["order"])
+        self._done.put(self._notify, (message["event"], table, message.get("data")))
+
+    def _apply_order(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Remplace le miroir d'une table, sauf par un état plus ancien (thread de lecture)"""
+        version = data.get("version", 0)
+        if version >= self._versions.get(table, 0):
+            self._versions[table] = version
+            order = self.orders[table] = Order.from_dict(data)
+            self._index(table, order)
+        return data
+
+    # Notifications (thread Tk)
+
+    def subscribe(self, listener: Callable[[str, str, Any], None]) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _notify(self, args) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(*args)
+            except Exception as e:
+                print(f"Erreur listener {args[0]}: {e}")
+
+    def poll(self) -> None:
+        """Livre les notifications et callbacks reçus (à appeler depuis le thread Tk)"""
+        self._done.poll()
+
+    def attach(self, root, interval_ms: int = 50) -> None:
+        self._done.attach(root, interval_ms)
+
+    # Méthodes d'OrderService utilisées par l'interface
+
+    @property
+    def current_order(self) -> Order:
+        order = self.orders.get(self.current_table)
+        if order is None:
+            order = self.orders[self.current_table] = Order(table=self.current_table)
+        return order
+
+    def switch_table(self, table: str) -> None:
+        self.current_table = table
+        self._notify(("table_switched", table, None))
+        self._send("open_table", {"table": table},
+                   convert=lambda data: self._apply_order(table, data),
+                   callback=self._on_snapshot)
+
+    def _on_snapshot(self, future: Future) -> None:
+        if future.exception() is None:
+            self._notify(("order_loaded", future.result()["table"], None))
+
+    @property
+    def registry(self) -> TableRegistry:
+        """Plan des tables du serveur, avec l'index des tables ouvertes en miroir"""
+        if self._registry is None:
+            result = self.call("tables")
+            registry = TableRegistry(result["salles"])
+            registry.load_statuses([TableStatus.from_dict(s) for s in result["statut"]])
+            self._registry = registry
+        return self._registry
+
+    def _index(self, table: str, order: Order) -> None:
+        if self._registry is not None:
+            self._registry.update(table, order)
+
+    def get_tables(self) -> List[str]:
+        return self.registry.tables()
+
+    def open_tables(self) -> List[str]:
+        return self.registry.open_tables()
+
+    def add_to_order(self, name: str, price: float, tva_rate: float, category: str) -> None:
+        table = self.current_table
+        order = self.current_order
+        if not order.items:
+            order.created_at = datetime.now()
+        order.add_item(OrderItem(name, price, 1, tva_rate, category))
+        self._index(table, order)
+        self._notify(("item_added", table, name))
+        self._send("add_item", {"table": table, "name": name, "price": price,
+                                "tva_rate": tva_rate, "category": category})
+
+    def remove_from_order(self, item_name: str) -> None:
+        table = self.current_table
+        self.current_order.remove_item(item_name)
+        self._index(table, self.current_order)
+        self._notify(("item_removed", table, item_name))
+        self._send("remove_item", {"table": table, "name": item_name})
+
+    def update_quantity(self, item_name: str, delta: int) -> None:
+        table = self.current_table
+        self.current_order.update_quantity(item_name, delta)
+        self._index(table, self.current_order)
+        self._notify(("quantity_changed", table, item_name))
+        self._send("update_quantity", {"table": table, "name": item_name, "delta": delta})
+
+    def mark_sent(self, changes: Optional[List[OrderItem]] = None,
+                  table: Optional[str] = None) -> None:
+        table = table or self.current_table
+        order = self.orders.get(table)
+        if order is not None:
+            order.mark_sent(changes)
+        params: Dict[str, Any] = {"table": table}
+        if changes is not None:
+            params["changes"] = [change.to_dict() for change in changes]
+        self._send("mark_sent", params)
+
+    def next_ticket_number(self) -> int:
+        return self.call("ticket_number")
+
+    def process_payment_async(self, payment_method: str,
+                              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        table = self.current_table
+        self.orders[table] = Order(table=table)
+        self._index(table, self.orders[table])
+        self._notify(("order_cleared", table, None))
+
+        def on_paid(future: Future) -> None:
+            if future.exception() is not None:
+                # Paiement refusé : la table reste ouverte sur le serveur
+                self._send("open_table", {"table": table}, callback=self._on_snapshot)
+            if callback is not None:
+                callback(future)
+
+        return self._send("pay", {"table": table, "payment_method": payment_method},
+                          Order.from_dict, on_paid)
+
+    def get_current_day_summary(self) -> Dict[str, Any]:
+        return self.call("x_report")
+
+    def generate_z_report_async(self,
+                                callback: Optional[Callable[[Future], None]] = None) -> Future:
+        return self._send("z_report", {}, callback=callback)
+
+    def replay_day(self, date: str) -> Dict[str, Any]:
+        return self.call("replay_day", date=date)
+
+    def close(self) -> None:
+        self._closed = True
+        self._done.detach()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._file.close()
+        self._sock.close()
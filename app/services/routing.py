@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, List
+
+# Routes historiques, utilisées si printer_config.json n'a pas de section "routage"
+DEFAULT_ROUTING = {
+    "stations": [
+        {"name": "CUISINE", "printer": "kitchen_printer", "categories": ["alimentation"]},
+        {"name": "BAR", "printer": "bar_printer",
+         "categories": ["alcool", "boisson sans alcool"]}
+    ]
+}
+
+
+class Station:
+    """Poste de préparation (cuisine, bar, four à pizza...) et son imprimante"""
+
+    __slots__ = ("name", "printer_name", "printer_config")
+
+    def __init__(self, name: str, printer_name: str, printer_config: Dict[str, Any]):
+        self.name = name
+        self.printer_name = printer_name
+        self.printer_config = printer_config
+
+    def __repr__(self) -> str:
+        return f"Station(name={self.name!r}, printer_name={self.printer_name!r})"
+
+
+class PreparationRouter:
+    """Table de routage des articles vers les postes de préparation
+
+    La section "routage" de printer_config.json liste les postes ; chacun
+    reçoit des catégories entières (`categories`) et/ou des articles précis
+    (`items`), une route par article l'emportant sur celle de sa catégorie.
+    La table est compilée une fois en deux dictionnaires, puis `split()`
+    répartit une commande en un seul passage. Les postes dont l'imprimante
+    est absente ou désactivée sont ignorés.
+    """
+
+    def __init__(self, routing: Dict[str, Any], printers: Dict[str, Any]):
+        self.stations: List[Station] = []
+        self._by_category: Dict[str, Station] = {}
+        self._by_item: Dict[str, Station] = {}
+
+        for entry in routing.get("stations", []):
+            printer_config = printers.get(entry.get("printer"))
+            if not printer_config or not printer_config.get("enabled", False):
+                continue
+            station = Station(entry["name"], entry["printer"], printer_config)
+            self.stations.append(station)
+            for category in entry.get("categories", []):
+                self._by_category.setdefault(category, station)
+            for item_name in entry.get("items", []):
+                self._by_item.setdefault(item_name, station)
+
+    @classmethod
+    def from_printer_config(cls, printer_config: Dict[str, Any]) -> 'PreparationRouter':
+        return cls(printer_config.get("routage", DEFAULT_ROUTING), printer_config)
+
+    def split(self, items: Iterable) -> Dict[Station, List[Any]]:
+        """Répartit les articles par poste, dans l'ordre des postes configurés"""
+        by_item = self._by_item
+        by_category = self._by_category
+        routed: Dict[Station, List[Any]] = {}
+        for item in items:
+            station = by_item.get(item.name) or by_category.get(item.category)
+            if station is not None:
+                routed.setdefault(station, []).append(item)
+        return {station: routed[station] for station in self.stations if station in routed}
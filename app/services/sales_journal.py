@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+
+FSYNC_ALWAYS = "always"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_NEVER)
+
+
+class SalesJournal:
+    """Journal des ventes en ajout seul (une vente JSON par ligne).
+
+    Chaque paiement ajoute une ligne en fin de fichier au lieu de relire et
+    réécrire tout le fichier du mois : le coût d'une vente est constant et un
+    arrêt brutal ne peut corrompre que la dernière ligne, ignorée à la lecture.
+    """
+
+    def __init__(self, path: str, fsync: str = FSYNC_ALWAYS):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a+b')
+            # Une écriture interrompue peut laisser une ligne sans fin de ligne
+            self._file.seek(0, os.SEEK_END)
+            if self._file.tell() > 0:
+                self._file.seek(-1, os.SEEK_END)
+                if self._file.read(1) != b"\n":
+                    self._file.write(b"\n")
+        return self._file
+
+    def append(self, record: Dict[str, Any], sync: Optional[bool] = None) -> None:
+        """Ajoute un enregistrement en fin de journal
+
+        `sync` remplace ponctuellement la politique fsync du journal, par
+        exemple pour laisser un commit groupé faire un seul fsync par lot.
+        """
+        if sync is None:
+            sync = self.fsync == FSYNC_ALWAYS
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            f = self._open()
+            f.write(line.encode('utf-8'))
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    def size(self) -> int:
+        """Taille du journal en octets (position d'un point de sauvegarde)"""
+        with self._lock:
+            f = self._open()
+            f.flush()
+            return f.seek(0, os.SEEK_END)
+
+    def truncate(self, size: int) -> None:
+        """Ramène le journal à `size` octets (annulation d'écritures non validées)"""
+        with self._lock:
+            f = self._open()
+            f.flush()
+            f.truncate(size)
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(f.fileno())
+
+    def sync(self) -> None:
+        """Force l'écriture sur disque des enregistrements en attente"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return read_journal(self.path)
+
+
+def read_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Parcourt un journal ligne par ligne en ignorant les lignes tronquées"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Dernière ligne incomplète après un arrêt brutal
+                continue
+
+
+def read_sales(folder: str, journal_name: str = "vente.jsonl",
+               legacy_name: str = "vente.json") -> Iterator[Dict[str, Any]]:
+    """Retourne les ventes d'un dossier mensuel au format Order.to_dict()
+
+    Les ventes de l'ancien fichier vente.json sont restituées en premier,
+    suivies de celles du journal.
+    """
+    legacy_file = os.path.join(folder, legacy_name)
+    if os.path.exists(legacy_file):
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                legacy_sales = json.load(f)
+        except Exception as e:
+            print(f"Erreur lors de la lecture de {legacy_file}: {e}")
+            legacy_sales = []
+        yield from legacy_sales
+
+    yield from read_journal(os.path.join(folder, journal_name))
+
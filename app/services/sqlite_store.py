@@ -0,0 +1,278 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services.sales_journal import FSYNC_ALWAYS, FSYNC_POLICIES
+from app.services.storage import SalesStore
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sale_date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    paid_at TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    total REAL NOT NULL,
+    is_paid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_id INTEGER NOT NULL REFERENCES orders(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    tva_rate REAL NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (order_id, position)
+);
+CREATE TABLE IF NOT EXISTS daily_sales (
+    date TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    numero_rapport INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS z_reports (
+    numero_rapport INTEGER PRIMARY KEY,
+    date_comptable TEXT NOT NULL,
+    date_emission TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(sale_date);
+CREATE INDEX IF NOT EXISTS idx_orders_table ON orders(table_name, sale_date);
+CREATE INDEX IF NOT EXISTS idx_orders_payment ON orders(payment_method, sale_date);
+CREATE INDEX IF NOT EXISTS idx_lines_name ON order_lines(name);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date, numero_rapport);
+CREATE INDEX IF NOT EXISTS idx_z_reports_date ON z_reports(date_comptable);
+"""
+
+
+class SQLiteSalesStore(SalesStore):
+    """Backend SQLite embarqué (mode WAL, une transaction par écriture)
+
+    Avec la politique fsync "always", chaque validation est synchronisée
+    sur disque (synchronous=FULL) : une vente confirmée survit à une coupure
+    de courant. Avec "never", le WAL n'est synchronisé qu'aux checkpoints.
+    """
+
+    def __init__(self, path: str, fsync: str = FSYNC_ALWAYS):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # La connexion est partagée entre threads, les accès sont sérialisés
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL" if fsync == FSYNC_ALWAYS
+                           else "PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._depth = 0
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def batch(self):
+        """Une seule transaction SQLite pour tout le lot"""
+        return _Transaction(self)
+
+    def savepoint(self):
+        """Transaction, ou SAVEPOINT à l'intérieur d'un lot"""
+        return _Transaction(self)
+
+    def save_sale(self, sale: Dict[str, Any], paid_at: Optional[datetime] = None) -> None:
+        paid_at = paid_at or datetime.now()
+        created_at = sale.get("created_at") or paid_at.isoformat()
+
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT INTO orders (sale_date, created_at, paid_at, table_name,"
+                " payment_method, total, is_paid) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (created_at[:10], created_at, paid_at.isoformat(), sale["table"],
+                 sale.get("payment_method", ""), sale.get("total", 0.0),
+                 int(sale.get("is_paid", False)))
+            )
+            order_id = cur.lastrowid
+            cur.executemany(
+                "INSERT INTO order_lines (order_id, position, name, price, quantity,"
+                " tva_rate, category) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (order_id, position, item["name"], item["price"], item["quantity"],
+                     item.get("tva_rate", 10.0), item.get("category", "alimentation"))
+                    for position, item in enumerate(sale.get("items", []))
+                ]
+            )
+
+    @staticmethod
+    def _where(date_from: Optional[str], date_to: Optional[str], table: Optional[str],
+               payment_method: Optional[str]):
+        clauses: List[str] = []
+        params: List[Any] = []
+        if date_from is not None:
+            clauses.append("sale_date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("sale_date <= ?")
+            params.append(date_to)
+        if table is not None:
+            clauses.append("table_name = ?")
+            params.append(table)
+        if payment_method is not None:
+            clauses.append("payment_method = ?")
+            params.append(payment_method)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def iter_sales(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   table: Optional[str] = None,
+                   payment_method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        where, params = self._where(date_from, date_to, table, payment_method)
+        with self._lock:
+            orders = self._conn.execute(
+                f"SELECT * FROM orders{where} ORDER BY id", params
+            ).fetchall()
+
+        for row in orders:
+            with self._lock:
+                lines = self._conn.execute(
+                    "SELECT * FROM order_lines WHERE order_id = ? ORDER BY position",
+                    (row["id"],)
+                ).fetchall()
+            yield {
+                "table": row["table_name"],
+                "items": [
+                    {
+                        "name": line["name"],
+                        "price": line["price"],
+                        "quantity": line["quantity"],
+                        "tva_rate": line["tva_rate"],
+                        "category": line["category"]
+                    }
+                    for line in lines
+                ],
+                "total": row["total"],
+                "payment_method": row["payment_method"],
+                "is_paid": bool(row["is_paid"]),
+                "created_at": row["created_at"]
+            }
+
+    def load_daily_sales(self, date: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM daily_sales WHERE date = ?", (date,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def save_daily_sales(self, daily_sales: Dict[str, Any]) -> None:
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO daily_sales (date, data) VALUES (?, ?)",
+                (daily_sales["date"], json.dumps(daily_sales, ensure_ascii=False))
+            )
+
+    def append_transaction(self, date: str, transaction: Dict[str, Any]) -> None:
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT INTO transactions (date, data) VALUES (?, ?)",
+                (date, json.dumps(transaction, ensure_ascii=False))
+            )
+
+    def iter_transactions(self, date: str) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM transactions WHERE date = ? AND numero_rapport IS NULL"
+                " ORDER BY id", (date,)
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row["data"])
+
+    def close_transactions(self, date: str, report_number: int) -> None:
+        with self._transaction() as cur:
+            cur.execute(
+                "UPDATE transactions SET numero_rapport = ?"
+                " WHERE date = ? AND numero_rapport IS NULL", (report_number, date)
+            )
+
+    def save_z_report(self, report: Dict[str, Any]) -> None:
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO z_reports (numero_rapport, date_comptable,"
+                " date_emission, data) VALUES (?, ?, ?, ?)",
+                (report["numero_rapport"], report["date_comptable"],
+                 report["date_emission"], json.dumps(report, ensure_ascii=False))
+            )
+
+    def next_counter(self, name: str) -> int:
+        with self._transaction() as cur:
+            cur.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+            )
+            row = cur.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row["value"]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """Transaction explicite sous le verrou du store
+
+    La transaction la plus externe utilise BEGIN IMMEDIATE ... COMMIT, les
+    transactions imbriquées (écritures d'un lot) des SAVEPOINT, afin qu'une
+    écriture en échec n'annule pas celles des autres paiements du lot.
+    """
+
+    def __init__(self, store: SQLiteSalesStore):
+        self._store = store
+
+    def __enter__(self) -> sqlite3.Cursor:
+        store = self._store
+        store._lock.acquire()
+        try:
+            self._cursor = store._conn.cursor()
+            self._savepoint = f"sp_{store._depth}" if store._depth else None
+            if self._savepoint:
+                self._cursor.execute(f"SAVEPOINT {self._savepoint}")
+            else:
+                self._cursor.execute("BEGIN IMMEDIATE")
+            store._depth += 1
+        except Exception:
+            store._lock.release()
+            raise
+        return self._cursor
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        store = self._store
+        try:
+            store._depth -= 1
+            if self._savepoint:
+                if exc_type is not None:
+                    self._cursor.execute(f"ROLLBACK TO {self._savepoint}")
+                self._cursor.execute(f"RELEASE {self._savepoint}")
+            elif exc_type is None:
+                self._cursor.execute("COMMIT")
+            else:
+                self._cursor.execute("ROLLBACK")
+        finally:
+            self._cursor.close()
+            store._lock.release()
@@ -0,0 +1,352 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.services.sales_journal import FSYNC_ALWAYS, SalesJournal, read_journal, read_sales
+
+
+MONTHS_FR = [
+    "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
+    "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"
+]
+
+
+class SalesStore:
+    """Interface commune des backends de persistance des ventes"""
+
+    def save_sale(self, sale: Dict[str, Any], paid_at: Optional[datetime] = None) -> None:
+        """Enregistre une vente payée (format Order.to_dict())"""
+        raise NotImplementedError
+
+    def iter_sales(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   table: Optional[str] = None,
+                   payment_method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Parcourt les ventes filtrées (dates au format YYYY-MM-DD, bornes incluses)"""
+        raise NotImplementedError
+
+    def load_daily_sales(self, date: str) -> Optional[Dict[str, Any]]:
+        """Charge les totaux du jour (sans les transactions), ou None"""
+        raise NotImplementedError
+
+    def save_daily_sales(self, daily_sales: Dict[str, Any]) -> None:
+        """Remplace l'instantané des totaux du jour (taille fixe)"""
+        raise NotImplementedError
+
+    def append_transaction(self, date: str, transaction: Dict[str, Any]) -> None:
+        """Ajoute une transaction au journal du jour"""
+        raise NotImplementedError
+
+    def iter_transactions(self, date: str) -> Iterator[Dict[str, Any]]:
+        """Parcourt les transactions du jour non encore clôturées"""
+        raise NotImplementedError
+
+    def close_transactions(self, date: str, report_number: int) -> None:
+        """Clôture les transactions du jour après un rapport Z"""
+        raise NotImplementedError
+
+    def save_z_report(self, report: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def next_counter(self, name: str) -> int:
+        """Incrémente et retourne un compteur persistant (rapports Z, tickets...)"""
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Regroupe plusieurs écritures en un seul point de durabilité
+
+        Les écritures faites dans le bloc ne sont garanties sur disque qu'à la
+        sortie du bloc. Par défaut chaque écriture est déjà durable.
+        """
+        yield
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Rend les écritures du bloc indivisibles
+
+        Si le bloc lève une exception, toutes ses écritures sont annulées ;
+        les blocs peuvent s'imbriquer, y compris dans un `batch()`. Par
+        défaut aucune annulation n'est possible.
+        """
+        yield
+
+    def close(self) -> None:
+        pass
+
+
+def _matches(sale: Dict[str, Any], date_from: Optional[str], date_to: Optional[str],
+             table: Optional[str], payment_method: Optional[str]) -> bool:
+    sale_date = sale.get("created_at", "")[:10]
+    if date_from is not None and sale_date < date_from:
+        return False
+    if date_to is not None and sale_date > date_to:
+        return False
+    if table is not None and sale.get("table") != table:
+        return False
+    if payment_method is not None and sale.get("payment_method") != payment_method:
+        return False
+    return True
+
+
+class JsonSalesStore(SalesStore):
+    """Backend fichiers : journal mensuel, ventes du jour et rapports Z en JSON"""
+
+    def __init__(self, base_dir: str = ".", fsync: str = FSYNC_ALWAYS):
+        self.base_dir = base_dir
+        self.fsync = fsync
+        os.makedirs(base_dir, exist_ok=True)
+        self._sales_journal: Optional[SalesJournal] = None
+        self._transaction_journal: Optional[SalesJournal] = None
+        self._batch_depth = 0
+        self._batch_journals: Dict[str, SalesJournal] = {}
+        self._batch_daily_sales: Dict[str, Dict[str, Any]] = {}
+        # Par point de sauvegarde ouvert : taille de chaque journal avant sa première écriture
+        self._savepoints: List[Dict[str, Tuple[SalesJournal, int]]] = []
+        self._counter_lock = threading.Lock()
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.base_dir, *parts)
+
+    def _sales_folder(self, now: datetime) -> str:
+        return self._path(f"Vente {MONTHS_FR[now.month - 1]} {now.year}")
+
+    def _get_sales_journal(self, now: datetime) -> SalesJournal:
+        """Retourne le journal du mois, en changeant de fichier au besoin"""
+        sales_file = os.path.join(self._sales_folder(now), "vente.jsonl")
+        if self._sales_journal is None or self._sales_journal.path != sales_file:
+            if self._sales_journal is not None:
+                self._sales_journal.close()
+            self._sales_journal = SalesJournal(sales_file, fsync=self.fsync)
+        return self._sales_journal
+
+    def _append(self, journal: SalesJournal, record: Dict[str, Any]) -> None:
+        for marks in self._savepoints:
+            if journal.path not in marks:
+                marks[journal.path] = (journal, journal.size())
+        if self._batch_depth:
+            journal.append(record, sync=False)
+            self._batch_journals[journal.path] = journal
+        else:
+            journal.append(record)
+
+    def save_sale(self, sale: Dict[str, Any], paid_at: Optional[datetime] = None) -> None:
+        # Le mois est celui de la date de la vente (created_at), celle que filtre
+        # iter_sales : une commande payée après minuit reste dans son mois
+        created_at = sale.get("created_at")
+        sale_date = datetime.fromisoformat(created_at) if created_at else paid_at or datetime.now()
+        self._append(self._get_sales_journal(sale_date), sale)
+
+    def _month_folders(self, date_from: Optional[str], date_to: Optional[str]) -> List[str]:
+        """Liste les dossiers mensuels couvrant l'intervalle demandé"""
+        folders = []
+        if not os.path.isdir(self.base_dir):
+            return folders
+        for entry in sorted(os.listdir(self.base_dir)):
+            parts = entry.split(" ")
+            if len(parts) != 3 or parts[0] != "Vente" or parts[1] not in MONTHS_FR:
+                continue
+            try:
+                month_key = f"{int(parts[2]):04d}-{MONTHS_FR.index(parts[1]) + 1:02d}"
+            except ValueError:
+                continue
+            if date_from is not None and month_key < date_from[:7]:
+                continue
+            if date_to is not None and month_key > date_to[:7]:
+                continue
+            folders.append((month_key, self._path(entry)))
+        return [folder for _, folder in sorted(folders)]
+
+    def iter_sales(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   table: Optional[str] = None,
+                   payment_method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for folder in self._month_folders(date_from, date_to):
+            for sale in read_sales(folder):
+                if _matches(sale, date_from, date_to, table, payment_method):
+                    yield sale
+
+    def _daily_file(self, date: str) -> str:
+        return self._path(f"ventes_jour_{date}.json")
+
+    def _transactions_file(self, date: str) -> str:
+        return self._path(f"ventes_jour_{date}.transactions.jsonl")
+
+    def _get_transaction_journal(self, date: str) -> SalesJournal:
+        transactions_file = self._transactions_file(date)
+        journal = self._transaction_journal
+        if journal is None or journal.path != transactions_file:
+            if journal is not None:
+                journal.close()
+            journal = SalesJournal(transactions_file, fsync=self.fsync)
+            self._transaction_journal = journal
+        return journal
+
+    def load_daily_sales(self, date: str) -> Optional[Dict[str, Any]]:
+        sales_file = self._daily_file(date)
+        if not os.path.exists(sales_file):
+            return None
+        try:
+            with open(sales_file, 'r', encoding='utf-8') as f:
+                daily_sales = json.load(f)
+        except Exception as e:
+            print(f"Erreur lors du chargement de {sales_file}: {e}")
+            return None
+
+        # Ancien format : les transactions étaient stockées avec les totaux
+        if "transactions" in daily_sales:
+            transactions = daily_sales.pop("transactions")
+            if not os.path.exists(self._transactions_file(date)):
+                journal = self._get_transaction_journal(date)
+                for transaction in transactions:
+                    journal.append(transaction)
+            self.save_daily_sales(daily_sales)
+
+        return daily_sales
+
+    def save_daily_sales(self, daily_sales: Dict[str, Any]) -> None:
+        if self._batch_depth:
+            # Seul le dernier instantané du lot est écrit
+            self._batch_daily_sales[daily_sales["date"]] = daily_sales
+            return
+        self._write_daily_sales(daily_sales)
+
+    def _write_daily_sales(self, daily_sales: Dict[str, Any]) -> None:
+        # Écriture atomique : un arrêt brutal laisse l'ancien instantané intact
+        sales_file = self._daily_file(daily_sales["date"])
+        tmp_file = sales_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(daily_sales, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(f.fileno())
+        os.replace(tmp_file, sales_file)
+
+    def append_transaction(self, date: str, transaction: Dict[str, Any]) -> None:
+        self._append(self._get_transaction_journal(date), transaction)
+
+    def iter_transactions(self, date: str) -> Iterator[Dict[str, Any]]:
+        return read_journal(self._transactions_file(date))
+
+    def close_transactions(self, date: str, report_number: int) -> None:
+        self._batch_journals.pop(self._transactions_file(date), None)
+        transactions_file = self._transactions_file(date)
+        if self._transaction_journal is not None \
+                and self._transaction_journal.path == transactions_file:
+            self._transaction_journal.close()
+            self._transaction_journal = None
+        if os.path.exists(transactions_file):
+            closed_file = self._path(f"ventes_jour_{date}.z{report_number:04d}.jsonl")
+            os.replace(transactions_file, closed_file)
+
+    def save_z_report(self, report: Dict[str, Any]) -> None:
+        reports_dir = self._path("rapports_z")
+        os.makedirs(reports_dir, exist_ok=True)
+
+        filename = f"rapport_z_{report['numero_rapport']:04d}_{report['date_comptable']}.json"
+        filepath = os.path.join(reports_dir, filename)
+
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def batch(self):
+        """Un lot est un point de sauvegarde : un fsync par journal, tout ou rien"""
+        return self.savepoint()
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Écritures indivisibles : les journaux sont tronqués en cas d'échec
+
+        Les ajouts sont faits sans fsync et l'instantané du jour est différé
+        jusqu'à la sortie du point de sauvegarde le plus externe, qui les rend
+        durables ; une exception ramène chaque journal à sa taille d'avant le
+        bloc et oublie les instantanés du bloc.
+        """
+        marks: Dict[str, Tuple[SalesJournal, int]] = {}
+        daily_sales = dict(self._batch_daily_sales)
+        self._savepoints.append(marks)
+        self._batch_depth += 1
+        try:
+            yield
+            if self._batch_depth == 1:
+                self._flush_batch()
+        except BaseException:
+            self._rollback(marks, daily_sales)
+            raise
+        finally:
+            self._batch_depth -= 1
+            self._savepoints.pop()
+
+    def _rollback(self, marks: Dict[str, Tuple[SalesJournal, int]],
+                  daily_sales: Dict[str, Dict[str, Any]]) -> None:
+        for journal, size in marks.values():
+            try:
+                journal.truncate(size)
+            except OSError as e:
+                print(f"Impossible d'annuler les écritures de {journal.path}: {e}")
+        self._batch_daily_sales = daily_sales
+
+    def _flush_batch(self) -> None:
+        """Un fsync par journal modifié et un seul instantané par jour"""
+        journals, self._batch_journals = self._batch_journals, {}
+        daily_sales, self._batch_daily_sales = self._batch_daily_sales, {}
+        if self.fsync == FSYNC_ALWAYS:
+            for journal in journals.values():
+                journal.sync()
+        for snapshot in daily_sales.values():
+            self._write_daily_sales(snapshot)
+
+    def _counter_file(self, name: str) -> str:
+        # Le compteur des rapports Z garde son fichier historique
+        if name == "rapport_z":
+            return self._path("dernier_rapport.txt")
+        return self._path(f"compteur_{name}.txt")
+
+    def next_counter(self, name: str) -> int:
+        # Les numéros de ticket servent de clé de déduplication au spool : deux
+        # terminaux ne doivent jamais recevoir le même, ni le compteur repartir
+        # à 1 après un arrêt brutal (d'où le verrou et le remplacement atomique)
+        counter_file = self._counter_file(name)
+        with self._counter_lock:
+            try:
+                with open(counter_file, "r") as f:
+                    last_number = int(f.read().strip())
+            except FileNotFoundError:
+                last_number = 0
+
+            next_number = last_number + 1
+
+            tmp_file = counter_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                f.write(str(next_number))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, counter_file)
+
+        return next_number
+
+    def close(self) -> None:
+        for journal in (self._sales_journal, self._transaction_journal):
+            if journal is not None:
+                journal.close()
+        self._sales_journal = None
+        self._transaction_journal = None
+
+
+def create_store(config: Optional[Dict[str, Any]] = None) -> SalesStore:
+    """Instancie le backend décrit par la configuration de stockage"""
+    if config is None:
+        config = {}
+
+    backend = config.get("backend", "json")
+    base_dir = config.get("data_dir", ".")
+
+    if backend == "json":
+        return JsonSalesStore(base_dir, fsync=config.get("fsync", FSYNC_ALWAYS))
+    if backend == "sqlite":
+        from app.services.sqlite_store import SQLiteSalesStore
+        return SQLiteSalesStore(os.path.join(base_dir, config.get("sqlite_file", "ventes.db")),
+                                fsync=config.get("fsync", FSYNC_ALWAYS))
+
+    raise ValueError(f"Backend de stockage inconnu: {backend}")
@@ -0,0 +1,204 @@
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.order import Order, OrderItem
+from app.services.sales_journal import FSYNC_ALWAYS, SalesJournal, read_journal
+
+
+def payment_key(order_data: Dict[str, Any]) -> str:
+    """Identifiant d'un paiement : table et heure d'ouverture de la commande"""
+    return f"{order_data['table']}|{order_data['created_at']}"
+
+
+class TableJournal:
+    """Journal des tables ouvertes, pour les retrouver après un arrêt brutal
+
+    Chaque modification d'une table (ajout, quantité, suppression, envoi en
+    préparation, clôture) est ajoutée à `tables_ouvertes.jsonl` avec un
+    numéro de séquence. Toutes les `snapshot_every` modifications, l'état
+    complet des tables est écrit dans `tables_ouvertes.json` et le journal
+    est vidé : au redémarrage, seules les modifications postérieures au
+    dernier instantané sont rejouées.
+
+    Un paiement est noté à la clôture de la table avec la commande payée,
+    puis marqué "settled" une fois la vente enregistrée ; les paiements
+    restés en attente sont retournés par `recover()` pour être terminés.
+
+    Les écritures sont faites par un thread dédié, dans l'ordre : une
+    saisie ne fait que mettre l'événement en file, et les événements
+    arrivés pendant un fsync partagent le suivant. `flush()` attend
+    qu'elles soient sur disque, `close()` les termine avant l'arrêt.
+    """
+
+    def __init__(self, folder: str = ".", fsync: str = FSYNC_ALWAYS,
+                 snapshot_every: int = 500):
+        os.makedirs(folder, exist_ok=True)
+        self.snapshot_path = os.path.join(folder, "tables_ouvertes.json")
+        self.events_path = os.path.join(folder, "tables_ouvertes.jsonl")
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self._events = SalesJournal(self.events_path, fsync=fsync)
+        self._seq = 0
+        self._since_snapshot = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="table-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, table: str, event: str, data: Optional[Dict[str, Any]] = None) -> bool:
+        """Met une modification en file ; retourne True quand un instantané est dû"""
+        self._seq += 1
+        self._queue.put(("event", {"seq": self._seq, "event": event, "table": table,
+                                   **(data or {})}))
+        self._since_snapshot += 1
+        return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, orders: Dict[str, Order], pending: Dict[str, Dict[str, Any]]) -> None:
+        """Fige l'état complet des tables ; il est écrit puis le journal vidé en arrière-plan"""
+        state = {
+            "seq": self._seq,
+            "tables": {table: order.to_dict(with_sent=True)
+                       for table, order in list(orders.items()) if order.items},
+            "paiements_en_attente": dict(pending)
+        }
+        self._since_snapshot = 0
+        self._queue.put(("snapshot", state))
+
+    def flush(self) -> None:
+        """Attend que les modifications mises en file soient écrites"""
+        future: Future = Future()
+        self._queue.put(("flush", future))
+        future.result()
+
+    def _run(self) -> None:
+        while True:
+            entries = [self._queue.get()]
+            # Tout ce qui est arrivé entre-temps partage le même fsync
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            unsynced = False
+            flushed = []
+            stop = False
+            for kind, payload in entries:
+                try:
+                    if kind == "event":
+                        self._events.append(payload, sync=False)
+                        unsynced = True
+                    elif kind == "snapshot":
+                        self._write_snapshot(payload)
+                        unsynced = False
+                    elif kind == "flush":
+                        flushed.append(payload)
+                    elif kind == "stop":
+                        stop = True
+                except Exception as e:
+                    print(f"Erreur journal des tables: {e}")
+            if unsynced and self.fsync == FSYNC_ALWAYS:
+                try:
+                    self._events.sync()
+                except OSError as e:
+                    print(f"Erreur journal des tables: {e}")
+            for future in flushed:
+                future.set_result(None)
+            if stop:
+                return
+
+    def _write_snapshot(self, state: Dict[str, Any]) -> None:
+        """Écrit l'état complet des tables puis vide le journal"""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # Les événements déjà inclus dans l'instantané peuvent disparaître ;
+        # s'ils survivent à un arrêt, leur numéro de séquence les fait ignorer
+        self._events.close()
+        with open(self.events_path, 'wb') as f:
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(f.fileno())
+
+    def recover(self) -> Tuple[Dict[str, Order], Dict[str, Dict[str, Any]]]:
+        """Reconstruit les tables ouvertes et les paiements en attente"""
+        orders: Dict[str, Order] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+        seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                seq = state.get("seq", 0)
+                for table, order_data in state.get("tables", {}).items():
+                    orders[table] = Order.from_dict(order_data)
+                pending.update(state.get("paiements_en_attente", {}))
+            except (OSError, ValueError) as e:
+                print(f"Instantané des tables illisible: {e}")
+
+        for event in read_journal(self.events_path):
+            if event.get("seq", 0) <= seq:
+                continue
+            seq = event["seq"]
+            try:
+                self._apply(orders, pending, event)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Événement de table ignoré {event}: {e}")
+
+        self._seq = seq
+        return orders, pending
+
+    @staticmethod
+    def _apply(orders: Dict[str, Order], pending: Dict[str, Dict[str, Any]],
+               event: Dict[str, Any]) -> None:
+        table = event["table"]
+        kind = event["event"]
+        if kind == "settled":
+            pending.pop(event["key"], None)
+            return
+
+        order = orders.get(table)
+        if order is None:
+            order = orders[table] = Order(table=table)
+
+        if kind == "add":
+            if not order.items and "opened" in event:
+                order.created_at = datetime.fromisoformat(event["opened"])
+            order.add_item(OrderItem(event["name"], event["price"], event.get("quantity", 1),
+                                     event.get("tva_rate", 10.0),
+                                     event.get("category", "alimentation")))
+        elif kind == "remove":
+            order.remove_item(event["name"])
+        elif kind == "quantity":
+            order.update_quantity(event["name"], event["delta"])
+        elif kind == "sent":
+            changes = event.get("changes")
+            order.mark_sent(None if changes is None
+                            else [OrderItem.from_dict(change) for change in changes])
+        elif kind == "restore":
+            order.merge(Order.from_dict(event["order"]))
+        elif kind == "close":
+            orders[table] = Order(table=table)
+            if "order" in event:
+                pending[payment_key(event["order"])] = {
+                    "order": event["order"],
+                    "payment_method": event["payment_method"]
+                }
+
+    def close(self) -> None:
+        """Termine les écritures en file puis arrête le thread du journal"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(("stop", None))
+            self._thread.join()
+        self._events.close()
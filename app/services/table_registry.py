@@ -0,0 +1,181 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.order import Order
+
+# Salle attribuée aux tables absentes de la configuration (créées par l'API...)
+OTHER_ROOM = "Autres"
+
+
+class TableStatus:
+    """État d'une table ouverte dans l'index du registre
+
+    Un statut n'est jamais modifié après sa création : le registre le
+    remplace à chaque changement, ce qui permet de le lire sans verrou.
+    """
+
+    __slots__ = ("table", "room", "total_cents", "lines", "opened_at")
+
+    def __init__(self, table: str, room: str, total_cents: int, lines: int,
+                 opened_at: datetime):
+        self.table = table
+        self.room = room
+        self.total_cents = total_cents
+        self.lines = lines
+        self.opened_at = opened_at
+
+    @property
+    def total(self) -> float:
+        return self.total_cents / 100
+
+    def open_minutes(self, now: Optional[datetime] = None) -> int:
+        """Minutes écoulées depuis l'ouverture de la table"""
+        now = now if now is not None else datetime.now()
+        return max(0, int((now - self.opened_at).total_seconds() // 60))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "salle": self.room,
+            "total": self.total,
+            "lignes": self.lines,
+            "ouverte_depuis": self.opened_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TableStatus":
+        return cls(data["table"], data.get("salle", OTHER_ROOM), round(data["total"] * 100),
+                   data.get("lignes", 0), datetime.fromisoformat(data["ouverte_depuis"]))
+
+    def __repr__(self) -> str:
+        return (f"TableStatus(table={self.table!r}, room={self.room!r}, "
+                f"total={self.total!r}, lines={self.lines!r})")
+
+
+class TableRegistry:
+    """Plan des tables (salles, terrasses...) et index des tables ouvertes
+
+    Le plan vient de `tables_config.json`. L'index est tenu à jour par
+    `update()`, appelé après chaque modification d'une table : il ne
+    recalcule aucune commande (le total courant d'Order est déjà tenu en
+    centimes), et les totaux par salle et de l'ensemble des tables
+    ouvertes sont ajustés de la seule différence.
+    """
+
+    def __init__(self, rooms: Dict[str, List[str]]):
+        self._rooms: Dict[str, List[str]] = {room: list(tables) for room, tables in rooms.items()}
+        self._room_of: Dict[str, str] = {}
+        for room, tables in self._rooms.items():
+            for table in tables:
+                self._room_of.setdefault(table, room)
+        self._tables = [table for tables in self._rooms.values() for table in tables]
+        self._position = {table: i for i, table in enumerate(self._tables)}
+
+        self._lock = threading.Lock()
+        self._open: Dict[str, TableStatus] = {}
+        # Par salle : [nombre de tables ouvertes, total en centimes]
+        self._room_totals: Dict[str, List[int]] = {}
+        self.open_total_cents = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TableRegistry":
+        """Construit le plan à partir de la section "salles" de la configuration
+
+        Une salle liste ses tables (`tables`) ou les numérote à partir d'un
+        préfixe : {"name": "Terrasse", "prefix": "Terrasse ", "count": 12}.
+        """
+        rooms: Dict[str, List[str]] = {}
+        for room in config.get("salles", []):
+            tables = list(room.get("tables", []))
+            if "count" in room:
+                start = room.get("start", 1)
+                prefix = room.get("prefix", f"{room['name']} ")
+                tables += [f"{prefix}{i}" for i in range(start, start + room["count"])]
+            rooms.setdefault(room["name"], []).extend(tables)
+        return cls(rooms)
+
+    # Plan
+
+    def tables(self) -> List[str]:
+        """Toutes les tables du plan, salle par salle"""
+        return list(self._tables)
+
+    def rooms(self) -> Dict[str, List[str]]:
+        return {room: list(tables) for room, tables in self._rooms.items()}
+
+    def room_of(self, table: str) -> str:
+        return self._room_of.get(table, OTHER_ROOM)
+
+    # Index des tables ouvertes
+
+    def update(self, table: str, order: Order) -> None:
+        """Reporte l'état d'une commande dans l'index (coût constant)"""
+        with self._lock:
+            old = self._open.get(table)
+            delta = -old.total_cents if old is not None else 0
+            if order.items:
+                room = self.room_of(table)
+                opened_at = old.opened_at if old is not None else order.created_at
+                self._open[table] = TableStatus(table, room, order.total_cents,
+                                                len(order.items), opened_at)
+                delta += order.total_cents
+                count_delta = 0 if old is not None else 1
+            elif old is not None:
+                room = old.room
+                del self._open[table]
+                count_delta = -1
+            else:
+                return
+
+            totals = self._room_totals.setdefault(room, [0, 0])
+            totals[0] += count_delta
+            totals[1] += delta
+            if not totals[0]:
+                del self._room_totals[room]
+            self.open_total_cents += delta
+
+    def load(self, orders: Dict[str, Order]) -> None:
+        """Reconstruit l'index à partir de toutes les commandes (au démarrage)"""
+        with self._lock:
+            self._open.clear()
+            self._room_totals.clear()
+            self.open_total_cents = 0
+        for table, order in list(orders.items()):
+            self.update(table, order)
+
+    def load_statuses(self, statuses: List[TableStatus]) -> None:
+        """Reconstruit l'index à partir de statuts reçus d'un serveur"""
+        with self._lock:
+            self._open = {status.table: status for status in statuses}
+            self._room_totals = {}
+            for status in statuses:
+                totals = self._room_totals.setdefault(status.room, [0, 0])
+                totals[0] += 1
+                totals[1] += status.total_cents
+            self.open_total_cents = sum(status.total_cents for status in statuses)
+
+    def status(self, table: str) -> Optional[TableStatus]:
+        """Statut d'une table, None si elle n'a pas de commande en cours"""
+        return self._open.get(table)
+
+    def open_tables(self) -> List[str]:
+        with self._lock:
+            return list(self._open)
+
+    def overview(self) -> List[TableStatus]:
+        """Statuts des tables ouvertes, dans l'ordre du plan puis d'ouverture"""
+        with self._lock:
+            statuses = list(self._open.values())
+        last = len(self._position)
+        return sorted(statuses, key=lambda s: (self._position.get(s.table, last), s.opened_at))
+
+    def room_summary(self) -> Dict[str, Tuple[int, float]]:
+        """Nombre de tables ouvertes et total en cours par salle"""
+        with self._lock:
+            return {room: (count, cents / 100)
+                    for room, (count, cents) in self._room_totals.items()}
+
+    @property
+    def open_total(self) -> float:
+        return self.open_total_cents / 100
@@ -0,0 +1,189 @@
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+# Commandes ESC/POS
+INIT = b"\x1B\x40"
+ALIGN_LEFT = b"\x1B\x61\x00"
+ALIGN_CENTER = b"\x1B\x61\x01"
+ALIGN_RIGHT = b"\x1B\x61\x02"
+NORMAL = b"\x1B\x21\x00"
+EMPHASIZED = b"\x1B\x21\x10"
+DOUBLE = b"\x1B\x21\x30"
+CUT = b"\x1D\x56\x00"
+
+DEFAULT_ENCODING = "cp858"
+
+# Table de caractères à sélectionner (ESC t n) pour chaque encodage Python
+CODE_PAGES = {
+    "cp437": 0,
+    "cp850": 2,
+    "cp860": 3,
+    "cp863": 4,
+    "cp865": 5,
+    "cp1252": 16,
+    "cp866": 17,
+    "cp852": 18,
+    "cp858": 19,
+}
+
+SEPARATOR = "-----------------------------\n"
+
+
+class TicketTemplate:
+    """Gabarits de tickets ESC/POS pour un encodage d'imprimante
+
+    Les parties fixes (en-têtes, séparateurs, pieds de page) sont encodées
+    une seule fois à la construction ; le rendu ne fait qu'ajouter les
+    lignes variables dans un `bytearray` réutilisé d'un ticket à l'autre.
+    Le texte est encodé dans la table de caractères de l'imprimante
+    (CP858 par défaut, qui contient « € » et les accents) et cette table
+    est sélectionnée en tête de ticket.
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING):
+        encoding = encoding.lower()
+        if encoding not in CODE_PAGES:
+            raise ValueError(f"Encodage d'imprimante non supporté: {encoding}")
+        self.encoding = encoding
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+        start = INIT + b"\x1B\x74" + bytes([CODE_PAGES[encoding]])
+        separator = self.encode(SEPARATOR)
+        self._separator = separator
+
+        self._receipt_header = (
+            start + ALIGN_CENTER + DOUBLE + self.encode("LA MEDUSA\n")
+            + NORMAL + self.encode("RESTAURANT\n") + separator
+        )
+        self._receipt_columns = (
+            separator + ALIGN_LEFT + EMPHASIZED + self.encode("ARTICLE          QTE   PRIX\n")
+            + NORMAL + separator
+        )
+        self._receipt_footer = (
+            separator + ALIGN_CENTER + self.encode("Merci pour votre visite !\n")
+            + self.encode("A bientôt !\n\n\n") + CUT
+        )
+
+        self._preparation_header = start + ALIGN_CENTER + DOUBLE
+        self._preparation_columns = (
+            separator + ALIGN_LEFT + EMPHASIZED + self.encode("ARTICLE          QTE\n")
+            + NORMAL + separator
+        )
+        self._preparation_footer = (
+            separator + self.encode("NOTES:\n") + separator + self.encode("\n\n") + CUT
+        )
+
+        self._z_header = (
+            start + ALIGN_CENTER + DOUBLE + self.encode("RAPPORT Z\n")
+            + NORMAL + self.encode("LA MEDUSA\n") + separator
+        )
+        self._z_totals = separator + EMPHASIZED + self.encode("TOTAL GENERAL\n") + NORMAL
+        self._z_footer = (
+            separator + ALIGN_CENTER + self.encode("*** RAPPORT Z ***\n")
+            + self.encode("Fin de rapport\n\n\n") + CUT
+        )
+
+    def encode(self, text: str) -> bytes:
+        """Encode du texte dans la table de l'imprimante (caractère inconnu -> '?')"""
+        return text.encode(self.encoding, errors="replace")
+
+    def _render(self, build) -> bytes:
+        with self._lock:
+            buffer = self._buffer
+            buffer.clear()
+            build(buffer)
+            return bytes(buffer)
+
+    def receipt(self, order, ticket_number: Optional[int] = None,
+                now: Optional[datetime] = None) -> bytes:
+        """Ticket de caisse du client"""
+        now = now or datetime.now()
+        encoding = self.encoding
+
+        def build(buffer: bytearray) -> None:
+            buffer += self._receipt_header
+            if ticket_number is not None:
+                buffer += f"Ticket N°: {ticket_number:06d}\n".encode(encoding, "replace")
+            buffer += f"Table: {order.table}\n".encode(encoding, "replace")
+            buffer += f"Date: {now.strftime('%d/%m/%Y %H:%M')}\n".encode(encoding, "replace")
+            buffer += self._receipt_columns
+            for item in order.items:
+                price = f"{item.total:.2f}€"
+                buffer += f"{item.name[:16]:<16} {item.quantity:>3} {price:>6}\n".encode(
+                    encoding, "replace")
+            buffer += self._separator
+            buffer += ALIGN_RIGHT
+            buffer += f"TOTAL: {order.total:.2f}€\n".encode(encoding, "replace")
+            buffer += ALIGN_LEFT
+            buffer += self._separator
+            for rate, details in order.tva_summary.items():
+                buffer += f"TVA {rate}%: {details['tva']:.2f}€\n".encode(encoding, "replace")
+            buffer += self._receipt_footer
+
+        return self._render(build)
+
+    def preparation(self, order, items: Iterable, destination: str,
+                    ticket_number: Optional[int] = None) -> bytes:
+        """Ticket de préparation pour la cuisine ou le bar (quantité < 0 : annulation)"""
+        items = list(items)
+        encoding = self.encoding
+
+        def build(buffer: bytearray) -> None:
+            buffer += self._preparation_header
+            buffer += f"{destination}\n".encode(encoding, "replace")
+            buffer += NORMAL
+            buffer += self._separator
+            if ticket_number is not None:
+                buffer += f"Ticket N°: {ticket_number:06d}\n".encode(encoding, "replace")
+            buffer += f"Table: {order.table}\n".encode(encoding, "replace")
+            buffer += f"Commande: {len(items)} article(s)\n".encode(encoding, "replace")
+            buffer += self._preparation_columns
+            for item in items:
+                if item.quantity < 0:
+                    line = f"{item.name[:16]:<16} {item.quantity:>3} ANNULE\n"
+                else:
+                    line = f"{item.name[:16]:<16} {item.quantity:>3}\n"
+                buffer += line.encode(encoding, "replace")
+            buffer += self._preparation_footer
+
+        return self._render(build)
+
+    def z_report(self, report: Dict[str, Any]) -> bytes:
+        """Rapport Z de fin de journée"""
+        encoding = self.encoding
+
+        def build(buffer: bytearray) -> None:
+            buffer += self._z_header
+            buffer += f"N°: {report['numero_rapport']:04d}\n".encode(encoding, "replace")
+            buffer += f"Date: {report['date_emission']}\n".encode(encoding, "replace")
+            buffer += self._z_totals
+            buffer += (
+                f"HT:   {report['total_ventes_ht']:10.2f}€\n"
+                f"TVA:  {report['total_tva']:10.2f}€\n"
+                f"TTC:  {report['total_ventes_ttc']:10.2f}€\n"
+                f"Transactions: {report['nombre_transactions']:4d}\n"
+            ).encode(encoding, "replace")
+            buffer += self._separator
+            buffer += b"DETAIL TVA\n"
+            for taux, details in report['ventes_par_taux'].items():
+                buffer += f"TVA {taux}%: {details['ttc']:8.2f}€\n".encode(encoding, "replace")
+            buffer += self._separator
+            buffer += b"MOYENS DE PAIEMENT\n"
+            for moyen, montant in report['ventes_par_moyen_paiement'].items():
+                buffer += f"{moyen:<15} {montant:8.2f}€\n".encode(encoding, "replace")
+            buffer += self._z_footer
+
+        return self._render(build)
+
+
+@lru_cache(maxsize=None)
+def _template(encoding: str) -> TicketTemplate:
+    return TicketTemplate(encoding)
+
+
+def template_for(printer_config: Dict[str, Any]) -> TicketTemplate:
+    """Gabarit compilé pour l'encodage d'une imprimante (`encoding`, CP858 par défaut)"""
+    return _template(printer_config.get("encoding", DEFAULT_ENCODING).lower())
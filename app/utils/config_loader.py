@@ -1,9 +1,20 @@
 import json
 import os
-from typing import Dict, Any, List
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 class ConfigLoader:
+    # Cache du menu partagé par tout le processus, invalidé par mtime/taille
+    MENU_CHECK_INTERVAL = 2.0
+    _menu_lock = threading.Lock()
+    _menu_cache: Optional[Dict[str, Any]] = None
+    _menu_stamp: Optional[Tuple[int, int]] = None
+    _menu_checked_at = 0.0
+    _item_index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    _items_by_name: Dict[str, Dict[str, Any]] = {}
+
     @staticmethod
     def load_config(file_path: str, default_config: Dict[str, Any] = None) -> Dict[str, Any]:
         if default_config is None:
@@ -20,12 +31,39 @@ class ConfigLoader:
     
     
     @staticmethod
-    def load_menu() -> Dict[str, Any]:
-        """Charge le menu depuis le fichier JSON"""
-        # Déterminer le chemin absolu du fichier menu
+    def _menu_path() -> Path:
         base_dir = Path(__file__).resolve().parent.parent.parent
-        menu_path = base_dir / 'config' / 'menu_restaurant.json'
-        
+        return base_dir / 'config' / 'menu_restaurant.json'
+
+    @staticmethod
+    def load_menu() -> Dict[str, Any]:
+        """Charge le menu depuis le fichier JSON
+
+        Le fichier n'est relu que si sa date de modification ou sa taille a
+        changé ; la vérification elle-même est limitée à une fois toutes les
+        MENU_CHECK_INTERVAL secondes. Le menu retourné est partagé : ne pas le
+        modifier, passer par save_menu.
+        """
+        with ConfigLoader._menu_lock:
+            now = time.monotonic()
+            if (ConfigLoader._menu_cache is not None
+                    and now - ConfigLoader._menu_checked_at < ConfigLoader.MENU_CHECK_INTERVAL):
+                return ConfigLoader._menu_cache
+            ConfigLoader._menu_checked_at = now
+
+            menu_path = ConfigLoader._menu_path()
+            try:
+                stat = os.stat(menu_path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp = None
+
+            if ConfigLoader._menu_cache is None or stamp != ConfigLoader._menu_stamp:
+                ConfigLoader._set_menu(ConfigLoader._read_menu(menu_path), stamp)
+            return ConfigLoader._menu_cache
+
+    @staticmethod
+    def _read_menu(menu_path: Path) -> Dict[str, Any]:
         default_menu = {
             "Entrées": {
                 "tva_rate": 10,
@@ -35,6 +73,33 @@ class ConfigLoader:
         }
         
         return ConfigLoader.load_config(str(menu_path), default_menu)
+
+    @staticmethod
+    def _set_menu(menu_data: Dict[str, Any], stamp: Optional[Tuple[int, int]]) -> None:
+        """Remplace le menu en cache et reconstruit l'index des articles"""
+        item_index = {}
+        items_by_name = {}
+        for category, category_data in menu_data.items():
+            for item_name, price in category_data.get("items", {}).items():
+                details = {
+                    "price": price,
+                    "tva_rate": category_data.get("tva_rate", 10.0),
+                    "category": category_data.get("category", "alimentation")
+                }
+                item_index[(category, item_name)] = details
+                items_by_name.setdefault(item_name, {**details, "menu_category": category})
+
+        ConfigLoader._menu_cache = menu_data
+        ConfigLoader._menu_stamp = stamp
+        ConfigLoader._item_index = item_index
+        ConfigLoader._items_by_name = items_by_name
+
+    @staticmethod
+    def invalidate_menu_cache() -> None:
+        """Force la relecture du menu au prochain accès"""
+        with ConfigLoader._menu_lock:
+            ConfigLoader._menu_cache = None
+            ConfigLoader._menu_stamp = None
     
     @staticmethod
     def load_printer_config() -> Dict[str, Any]:
@@ -48,26 +113,65 @@ class ConfigLoader:
                 "ip": "192.168.1.100",
                 "port": 9100,
                 "timeout": 5,
-                "name": "Imprimante Cuisine"
+                "name": "Imprimante Cuisine",
+                "encoding": "cp858"
             },
             "receipt_printer": {
                 "enabled": True,
                 "ip": "192.168.1.101",
                 "port": 9100,
                 "timeout": 5,
-                "name": "Imprimante Tickets"
+                "name": "Imprimante Tickets",
+                "encoding": "cp858"
             },
             "bar_printer": {
                 "enabled": False,
                 "ip": "192.168.1.102",
                 "port": 9100,
                 "timeout": 5,
-                "name": "Imprimante Bar"
+                "name": "Imprimante Bar",
+                "encoding": "cp858"
             }
+            # Sans section "routage", PreparationRouter applique DEFAULT_ROUTING
         }
         
         return ConfigLoader.load_config(str(printer_path), default_config)
     
+    @staticmethod
+    def load_storage_config() -> Dict[str, Any]:
+        """Charge la configuration du stockage des ventes"""
+        base_dir = Path(__file__).resolve().parent.parent.parent
+        storage_path = base_dir / 'config' / 'storage_config.json'
+
+        default_config = {
+            "backend": "json",
+            "data_dir": ".",
+            "fsync": "always",
+            "sqlite_file": "ventes.db",
+            "group_commit": {
+                "enabled": False,
+                "max_delay_ms": 5,
+                "max_batch": 64
+            }
+        }
+
+        return ConfigLoader.load_config(str(storage_path), default_config)
+    
+    @staticmethod
+    def load_tables_config() -> Dict[str, Any]:
+        """Charge le plan des tables (salles, terrasses...)"""
+        base_dir = Path(__file__).resolve().parent.parent.parent
+        tables_path = base_dir / 'config' / 'tables_config.json'
+
+        default_config = {
+            "salles": [
+                {"name": "Salle", "prefix": "Table ", "count": 20},
+                {"name": "Comptoir", "tables": ["À emporter", "Comptoir"]}
+            ]
+        }
+
+        return ConfigLoader.load_config(str(tables_path), default_config)
+
     @staticmethod
     def get_menu_categories() -> List[str]:
         """Retourne la liste des catégories du menu"""
@@ -85,16 +189,20 @@ class ConfigLoader:
     @staticmethod
     def get_item_details(category: str, item_name: str) -> Dict[str, Any]:
         """Retourne les détails d'un item spécifique"""
-        menu_data = ConfigLoader.load_menu()
-        if category in menu_data:
-            category_data = menu_data[category]
-            if item_name in category_data.get("items", {}):
-                return {
-                    "price": category_data["items"][item_name],
-                    "tva_rate": category_data.get("tva_rate", 10.0),
-                    "category": category_data.get("category", "alimentation")
-                }
-        return None
+        ConfigLoader.load_menu()
+        details = ConfigLoader._item_index.get((category, item_name))
+        return dict(details) if details is not None else None
+
+    @staticmethod
+    def find_item(item_name: str) -> Optional[Dict[str, Any]]:
+        """Retourne les détails d'un article à partir de son seul nom
+
+        Utile pour les scanners ou une API qui ne connaissent pas la
+        catégorie du menu ; celle-ci est retournée dans "menu_category".
+        """
+        ConfigLoader.load_menu()
+        details = ConfigLoader._items_by_name.get(item_name)
+        return dict(details) if details is not None else None
     
     @staticmethod
     def save_menu(new_menu_data: Dict[str, Any]) -> bool:
@@ -106,6 +214,7 @@ class ConfigLoader:
             with open(menu_path, 'w', encoding='utf-8') as f:
                 json.dump(new_menu_data, f, ensure_ascii=False, indent=2)
             
+            ConfigLoader.invalidate_menu_cache()
             print("Menu sauvegardé avec succès!")
             return True
         except Exception as e:
@@ -0,0 +1,63 @@
+"""Mesure les paiements par seconde avec et sans commit groupé.
+
+Usage : python -m benchmarks.bench_group_commit [--terminals 8] [--payments 50]
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from app.models.order import Order, OrderItem
+from app.services.group_commit import GroupCommitter
+from app.services.storage import create_store
+from app.services.order_service import OrderService
+
+
+def make_order(table: str) -> Order:
+    order = Order(table=table)
+    order.add_item(OrderItem(name="Steak Frites", price=22.0, category="alimentation"))
+    order.add_item(OrderItem(name="Café", price=2.0, category="boisson sans alcool"))
+    return order
+
+
+def run(backend: str, terminals: int, payments: int, group_commit: bool,
+        max_delay_ms: float) -> float:
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = create_store({"backend": backend, "data_dir": data_dir, "fsync": "always"})
+        committer = GroupCommitter(store, max_delay=max_delay_ms / 1000) if group_commit else None
+        service = OrderService(store=store, committer=committer)
+
+        def terminal(index: int):
+            for _ in range(payments):
+                service.settle_order(make_order(f"Table {index}"), "Carte Bancaire")
+
+        threads = [threading.Thread(target=terminal, args=(i,)) for i in range(terminals)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if committer is not None:
+            committer.close()
+        store.close()
+        return terminals * payments / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--terminals", type=int, default=8)
+    parser.add_argument("--payments", type=int, default=50)
+    parser.add_argument("--max-delay-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    for backend in ("json", "sqlite"):
+        sync = run(backend, args.terminals, args.payments, False, args.max_delay_ms)
+        grouped = run(backend, args.terminals, args.payments, True, args.max_delay_ms)
+        print(f"{backend:<7} sans groupement: {sync:8.1f} paiements/s   "
+              f"avec groupement: {grouped:8.1f} paiements/s   (x{grouped / sync:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Mesure le temps de construction du panneau menu, onglets paresseux ou non.
+
+Usage : python -m benchmarks.bench_menu_startup [--repeat 5]
+
+Nécessite un affichage (ou Xvfb) ; sans affichage la mesure est ignorée.
+"""
+import argparse
+import json
+import os
+import time
+import tkinter as tk
+
+from app.gui.components.menu_panel import MenuPanel
+from app.utils.config_loader import ConfigLoader
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def full_menu():
+    """Menu du restaurant complété par la carte des boissons (articles_photo_json.json)"""
+    menu = dict(ConfigLoader.load_menu())
+    drinks_path = os.path.join(BASE_DIR, "articles_photo_json.json")
+    if os.path.exists(drinks_path):
+        with open(drinks_path, 'r', encoding='utf-8') as f:
+            menu.update(json.load(f))
+    return menu
+
+
+def run(root, menu, lazy: bool) -> float:
+    """Secondes jusqu'au premier affichage complet du panneau"""
+    start = time.perf_counter()
+    panel = MenuPanel(root, menu, lambda *args: None)
+    if not lazy:
+        panel.build_all_tabs()
+    panel.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    elapsed = time.perf_counter() - start
+    panel.destroy()
+    root.update()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Mesure ignorée, pas d'affichage disponible: {e}")
+        return
+
+    menu = full_menu()
+    buttons = sum(len(category["items"]) for category in menu.values())
+    print(f"{len(menu)} catégories, {buttons} articles")
+
+    results = {}
+    for lazy in (False, True):
+        best = min(run(root, menu, lazy) for _ in range(args.repeat))
+        results[lazy] = best
+        mode = "paresseux" if lazy else "complet"
+        print(f"construction {mode:<10} {best * 1000:8.1f} ms")
+    print(f"gain au démarrage : x{results[False] / results[True]:.1f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Mesure l'envoi de tickets avec et sans réutilisation des connexions.
+
+Vérifie au passage, sur une imprimante factice, la réutilisation des
+connexions, la limite de connexions simultanées et la reconnexion après
+un redémarrage de l'imprimante.
+
+Usage : python -m benchmarks.bench_printer_pool [--tickets 500] [--terminals 4]
+"""
+import argparse
+import threading
+import time
+
+from app.services.fake_printer import FakePrinterServer
+from app.services.printer import PrinterPool
+
+TICKET = b"\x1b@" + b"Ticket de test\n" * 20 + b"\x1dV\x00"
+
+
+def run(tickets: int, terminals: int, reuse: bool) -> float:
+    """Tickets par seconde envoyés par `terminals` threads"""
+    printer = FakePrinterServer().start()
+    config = printer.printer_config
+    pool = PrinterPool()
+    per_terminal = tickets // terminals
+
+    def terminal():
+        for _ in range(per_terminal):
+            if reuse:
+                pool.send("bench", config, TICKET)
+            else:
+                # Une connexion neuve par ticket, comme avant le pool
+                fresh = PrinterPool()
+                fresh.send("bench", config, TICKET)
+                fresh.close()
+
+    threads = [threading.Thread(target=terminal) for _ in range(terminals)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    pool.close()
+    printer.stop()
+    return per_terminal * terminals / elapsed
+
+
+def wait_received(printer: FakePrinterServer, tickets: int, timeout: float = 5.0) -> bool:
+    """Attend que l'imprimante factice ait reçu `tickets` tickets"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with printer.lock:
+            if len(printer.received) >= tickets * len(TICKET):
+                return True
+        time.sleep(0.01)
+    return False
+
+
+def check_pool(terminals: int) -> None:
+    """Réutilisation, limite de connexions et reconnexion sur l'imprimante factice"""
+    printer = FakePrinterServer(delay=0.01).start()
+    config = printer.printer_config
+    pool = PrinterPool(max_connections=1, backoff_base=0.05)
+
+    threads = [threading.Thread(target=lambda: [pool.send("bench", config, TICKET)
+                                                for _ in range(10)])
+               for _ in range(terminals)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_received(printer, terminals * 10)
+    print(f"réutilisation : {printer.connections} connexion(s) pour {terminals * 10} tickets, "
+          f"au plus {printer.max_active} simultanée(s) (limite 1)")
+
+    # Imprimante éteinte puis rallumée sur le même port
+    port = printer.port
+    printer.stop()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    printer = FakePrinterServer(port=port).start()
+    while True:
+        try:
+            pool.send("bench", config, TICKET)
+            break
+        except OSError:
+            time.sleep(0.01)
+    received = wait_received(printer, 1)
+    print(f"reconnexion : ticket {'imprimé' if received else 'PERDU'} "
+          f"{time.perf_counter() - start:.2f}s après le redémarrage, "
+          f"{printer.connections} nouvelle connexion")
+
+    pool.close()
+    printer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--terminals", type=int, default=4)
+    args = parser.parse_args()
+
+    fresh = run(args.tickets, args.terminals, reuse=False)
+    pooled = run(args.tickets, args.terminals, reuse=True)
+    print(f"connexion par ticket: {fresh:8.1f} tickets/s   "
+          f"connexions réutilisées: {pooled:8.1f} tickets/s   (x{pooled / fresh:.1f})")
+    check_pool(args.terminals)
+
+
+if __name__ == "__main__":
+    main()